@@ -0,0 +1,5 @@
+from django.apps import AppConfig
+
+
+class AirbnbFixtureConfig(AppConfig):
+    name = 'airbnb_fixture'
@@ -0,0 +1,118 @@
+import random
+
+# Places the autosuggest knows about: every TOP_20_COUNTRIES entry plus a few cities
+PLACES = {
+    'United States': ['New York', 'Los Angeles', 'Chicago'],
+    'China': ['Beijing', 'Shanghai', 'Chengdu'],
+    'India': ['Mumbai', 'Delhi', 'Goa'],
+    'Brazil': ['Rio de Janeiro', 'São Paulo', 'Salvador'],
+    'Russia': ['Moscow', 'Saint Petersburg', 'Sochi'],
+    'Indonesia': ['Bali', 'Jakarta', 'Yogyakarta'],
+    'Pakistan': ['Lahore', 'Karachi', 'Islamabad'],
+    'Nigeria': ['Lagos', 'Abuja', 'Ibadan'],
+    'Bangladesh': ["Cox's Bazar", 'Dhaka', 'Sylhet'],
+    'Ethiopia': ['Addis Ababa', 'Bahir Dar', 'Gondar'],
+    'Mexico': ['Mexico City', 'Cancún', 'Tulum'],
+    'Japan': ['Tokyo', 'Kyoto', 'Osaka'],
+    'Philippines': ['Manila', 'Cebu', 'Boracay'],
+    'Egypt': ['Cairo', 'Alexandria', 'Luxor'],
+    'Vietnam': ['Hanoi', 'Ho Chi Minh City', 'Da Nang'],
+    'Iran': ['Tehran', 'Isfahan', 'Shiraz'],
+    'Turkey': ['Istanbul', 'Antalya', 'Cappadocia'],
+    'Germany': ['Berlin', 'Munich', 'Hamburg'],
+    'Thailand': ['Bangkok', 'Phuket', 'Chiang Mai'],
+    'France': ['Paris', 'Nice', 'Lyon'],
+}
+
+AMENITIES = [
+    'Wifi', 'Kitchen', 'Free parking on premises', 'Pool', 'Air conditioning',
+    'Washer', 'Dryer', 'Dedicated workspace', 'TV', 'Hair dryer', 'Iron',
+    'Hot tub', 'EV charger', 'Gym', 'BBQ grill', 'Breakfast', 'Smoke alarm',
+]
+
+HOSTS = ['Amina', 'Kenji', 'Lucía', 'Oliver', 'Priya', 'Mateus', 'Chloé', 'Tariq', 'Ngozi', 'Linh']
+
+PROPERTY_TYPES = ['Entire home', 'Entire rental unit', 'Private room', 'Villa', 'Cabin', 'Loft']
+
+
+def suggestions(query: str, limit: int = 5) -> list:
+    """Places whose country or city starts with the query, countries first."""
+    q = query.strip().lower()
+    if not q:
+        return []
+    out = []
+    for country, cities in PLACES.items():
+        if country.lower().startswith(q):
+            out.append(country)
+            out.extend(f'{city}, {country}' for city in cities)
+    for country, cities in PLACES.items():
+        for city in cities:
+            label = f'{city}, {country}'
+            if city.lower().startswith(q) and label not in out:
+                out.append(label)
+    return out[:limit]
+
+
+def listing(room_id: int, location: str = '') -> dict:
+    """Deterministic synthetic listing for a room id."""
+    rnd = random.Random(room_id)
+    where = location or rnd.choice(list(PLACES))
+    kind = rnd.choice(PROPERTY_TYPES)
+    return {
+        'id': room_id,
+        'title': f'{kind} in {where}',
+        'name': f'{rnd.choice(["Sunny", "Quiet", "Cozy", "Modern", "Rustic"])} '
+                f'{rnd.choice(["retreat", "studio", "flat", "hideaway", "house"])} #{room_id}',
+        'host': rnd.choice(HOSTS),
+        'rating': round(rnd.uniform(4.2, 5.0), 2),
+        'reviews': rnd.randint(3, 480),
+        'price': rnd.randint(25, 600),
+        'lat': round(rnd.uniform(-60, 60), 5),
+        'lng': round(rnd.uniform(-170, 170), 5),
+        'amenities': rnd.sample(AMENITIES, rnd.randint(6, 14)),
+        'images': [f'/airbnb/img/{room_id}-{n}.svg' for n in range(rnd.randint(5, 12))],
+    }
+
+
+def search_result(listing: dict) -> dict:
+    """One entry of the StaysSearch searchResults list."""
+    return {
+        'listing': {
+            'id': str(listing['id']),
+            'title': listing['title'],
+            'name': listing['name'],
+            'avgRatingLocalized': f"{listing['rating']} ({listing['reviews']})",
+            'coordinate': {'latitude': listing['lat'], 'longitude': listing['lng']},
+            'contextualPictures': [{'picture': src} for src in listing['images']],
+        },
+        'pricingQuote': {'structuredStayDisplayPrice': {
+            'primaryLine': {'price': f"${listing['price']}", 'qualifier': 'night'},
+        }},
+    }
+
+
+def listing_state(listing: dict) -> dict:
+    """Listing in the shape of the page state the real detail page embeds.
+
+    Only the sections tracker.steps.step06 reads are included.
+    """
+    sections = [
+        ('TITLE_DEFAULT', {'title': listing['name']}),
+        ('OVERVIEW_DEFAULT_V2', {'title': listing['title']}),
+        ('PHOTO_TOUR_SCROLLABLE', {'mediaItems': [{'baseUrl': src} for src in listing['images']]}),
+        ('HOST_OVERVIEW_DEFAULT', {'title': f"Hosted by {listing['host']}"}),
+        ('REVIEWS_DEFAULT', {'overallRating': listing['rating'], 'overallCount': listing['reviews']}),
+        ('AMENITIES_DEFAULT', {'seeAllAmenitiesGroups': [{
+            'title': 'Amenities',
+            'amenities': [{'title': name, 'available': True} for name in listing['amenities']],
+        }]}),
+        ('BOOK_IT_SIDEBAR', {'structuredDisplayPrice': {
+            'primaryLine': {'price': f"${listing['price']}", 'qualifier': 'night'},
+        }}),
+    ]
+    page = {'sections': {'sections': [
+        {'sectionComponentType': kind, 'section': section} for kind, section in sections
+    ]}}
+    return {'niobeMinimalClientData': [
+        [f"StaysPdpSections:{listing['id']}", {'data': {'presentation': {'stayProductDetailPage': page}}}],
+    ]}
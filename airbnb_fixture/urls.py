@@ -0,0 +1,11 @@
+from django.urls import path
+from airbnb_fixture import views
+
+urlpatterns = [
+    path('', views.home, name='fixture-home'),
+    path('api/suggestions', views.suggestions, name='fixture-suggestions'),
+    path('api/v3/StaysSearch', views.search_api, name='fixture-search-api'),
+    path('s/<str:location>/homes', views.results, name='fixture-results'),
+    path('rooms/<int:room_id>', views.room, name='fixture-room'),
+    path('img/<str:name>.svg', views.image, name='fixture-image'),
+]
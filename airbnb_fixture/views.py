@@ -0,0 +1,94 @@
+import time
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+from airbnb_fixture import data
+
+# Upper bounds for the query parameters, so one request cannot tie up a worker
+MAX_DELAY_MS = 10_000
+MAX_CARDS = 100
+MAX_PAGES = 50
+
+
+def _int_param(request, name, default, low, high) -> int:
+    """?name= as an int clamped to [low, high]; the default when missing or not a number."""
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
+
+def _delay(request):
+    """Simulate server latency: ?delay_ms= overrides FIXTURE_DELAY_MS."""
+    delay_ms = _int_param(request, 'delay_ms', settings.FIXTURE_DELAY_MS, 0, MAX_DELAY_MS)
+    if delay_ms > 0:
+        time.sleep(delay_ms / 1000)
+
+
+def home(request):
+    _delay(request)
+    return render(request, 'airbnb_fixture/home.html')
+
+
+def suggestions(request):
+    _delay(request)
+    return JsonResponse({'suggestions': data.suggestions(request.GET.get('q', ''))})
+
+
+def _result_page(request, location) -> dict:
+    """Listings and pagination of one results page, shared by the page and its API."""
+    card_count = _int_param(request, 'cards', settings.FIXTURE_CARD_COUNT, 1, MAX_CARDS)
+    page_count = _int_param(request, 'pages', settings.FIXTURE_RESULT_PAGES, 1, MAX_PAGES)
+    offset = _int_param(request, 'items_offset', 0, 0, card_count * (page_count - 1))
+    # Room ids depend on the location so different searches show different rooms
+    base = sum(ord(c) for c in location) * 1000
+    # Like the real site, later pages repeat the last listing of the page before
+    first = offset - 1 if offset else offset
+    listings = [data.listing(base + i, location) for i in range(first, offset + card_count)]
+
+    next_url = ''
+    if offset + card_count < card_count * page_count:
+        params = request.GET.copy()
+        params['items_offset'] = offset + card_count
+        next_url = f'?{params.urlencode()}'
+    return {
+        'location': location,
+        'listings': listings,
+        'total': card_count * page_count,
+        'page': offset // card_count + 1 if card_count else 1,
+        'next_url': next_url,
+    }
+
+
+def results(request, location):
+    _delay(request)
+    return render(request, 'airbnb_fixture/results.html', _result_page(request, location))
+
+
+def search_api(request):
+    """The results page's listings in the shape of the real StaysSearch response."""
+    _delay(request)
+    page = _result_page(request, request.GET.get('location', ''))
+    return JsonResponse({'data': {'presentation': {'staysSearch': {'results': {
+        'searchResults': [data.search_result(listing) for listing in page['listings']],
+        'paginationInfo': {'pageCursors': [], 'nextPageCursor': page['next_url'] or None},
+    }}}}})
+
+
+def room(request, room_id):
+    _delay(request)
+    listing = data.listing(room_id, request.GET.get('location', ''))
+    return render(request, 'airbnb_fixture/room.html', {
+        'listing': listing,
+        'state': data.listing_state(listing),
+    })
+
+
+def image(request, name):
+    hue = sum(ord(c) for c in name) % 360
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="320" height="240">'
+        f'<rect width="320" height="240" fill="hsl({hue},60%,70%)"/></svg>'
+    )
+    return HttpResponse(svg, content_type='image/svg+xml')
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'tracker',
+    'airbnb_fixture',
 ]
 
 MIDDLEWARE = [
@@ -82,6 +83,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Concurrent scenarios write from several threads at once
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -121,3 +124,41 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Step screenshots: stored by content hash, encoded in the background
+
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'webp')  # webp, jpeg or png
+
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '70'))
+
+
+# Local stand-in Airbnb site (airbnb_fixture), served under /airbnb/
+# Point AIRBNB_URL at http://127.0.0.1:8000/airbnb/ to run the steps against it.
+# Only mounted when DEBUG or FIXTURE_SITE is on
+
+FIXTURE_SITE = os.getenv('FIXTURE_SITE', 'False') == 'True'
+
+FIXTURE_CARD_COUNT = int(os.getenv('FIXTURE_CARD_COUNT', '20'))
+
+FIXTURE_DELAY_MS = int(os.getenv('FIXTURE_DELAY_MS', '0'))
+
+FIXTURE_RESULT_PAGES = int(os.getenv('FIXTURE_RESULT_PAGES', '5'))
+
+
+# step01 reuses a cached autosuggest list for this long before refreshing it
+# with the slow, character-by-character typing
+
+SUGGESTION_CACHE_TTL_HOURS = float(os.getenv('SUGGESTION_CACHE_TTL_HOURS', '24'))
+
+
+# Share of step01 runs that try the countries in random order instead of the
+# learned one, so rarely picked countries keep being re-measured
+
+COUNTRY_EXPLORATION_RATE = float(os.getenv('COUNTRY_EXPLORATION_RATE', '0.1'))
+
+
+# Where `manage.py browser_server` publishes its websocket endpoint for
+# `run_automation --connect` / `bench_automation --connect`
+
+BROWSER_ENDPOINT_FILE = os.getenv('BROWSER_ENDPOINT_FILE', str(BASE_DIR / '.browser-endpoint'))
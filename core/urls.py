@@ -14,9 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 ]
+
+# The stand-in site is for local runs and benchmarks, never for production
+if settings.DEBUG or settings.FIXTURE_SITE:
+    urlpatterns.append(path('airbnb/', include('airbnb_fixture.urls')))
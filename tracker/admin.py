@@ -1,11 +1,108 @@
 from django.contrib import admin
-from tracker.models import Result
+from django.db.models import Exists, OuterRef
+from tracker.changelist import EstimatedCountPaginator, search_results
+from tracker.models import (
+    ConsoleEvent, CountryStats, NetworkEvent, NetworkRollup, Result, Run, StepMetric, SuggestionCache, TestCaseName,
+)
+
+
+class TestCaseFilter(admin.SimpleListFilter):
+    """test_case filter fed by TestCaseName instead of SELECT DISTINCT over results."""
+    title = 'test case'
+    parameter_name = 'test_case'
+
+    def lookups(self, request, model_admin):
+        # prune_results can leave names with no rows left; rows are found
+        # through the (test_case, created_at) index. The names are not
+        # deleted there, since running processes cache them as registered.
+        names = TestCaseName.objects.filter(Exists(Result.objects.filter(test_case=OuterRef('name'))))
+        return [(name, name) for name in names.values_list('name', flat=True)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(test_case=self.value())
+        return queryset
 
 
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
-    list_display = ('test_case', 'passed', 'url', 'screenshot', 'created_at')
-    list_filter = ('passed', 'test_case')
+    list_display = ('test_case', 'run', 'step', 'status', 'duration_ms', 'passed', 'url', 'screenshot',
+                    'created_at')
+    list_filter = ('passed', 'status', TestCaseFilter)
+    list_select_related = ('run',)
     search_fields = ('test_case', 'comment', 'url')
+    search_help_text = 'Full-text search over test case, comment and URL (word prefixes)'
+    raw_id_fields = ('run',)
+    readonly_fields = ('created_at',)
+    ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            results = search_results(queryset, search_term)
+            if results is not None:
+                return results, False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class StepMetricInline(admin.TabularInline):
+    model = StepMetric
+    extra = 0
+    can_delete = False
+    readonly_fields = ('step', 'passed', 'wall_ms', 'wait_ms', 'cdp_calls', 'evaluate_calls',
+                       'query_calls', 'locator_calls', 'db_writes', 'db_rows', 'error')
+    fields = readonly_fields
+
+
+@admin.register(Run)
+class RunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'scenario', 'passed', 'duration_ms', 'started_at')
+    list_filter = ('passed',)
+    readonly_fields = ('started_at', 'finished_at')
+    ordering = ('-started_at',)
+    inlines = (StepMetricInline,)
+
+
+@admin.register(StepMetric)
+class StepMetricAdmin(admin.ModelAdmin):
+    list_display = ('run', 'step', 'passed', 'wall_ms', 'wait_ms', 'cdp_calls', 'db_writes', 'created_at')
+    list_filter = ('step', 'passed')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(ConsoleEvent)
+class ConsoleEventAdmin(admin.ModelAdmin):
+    list_display = ('run', 'level', 'text', 'created_at')
+    list_filter = ('level',)
     readonly_fields = ('created_at',)
-    ordering = ('-created_at',)
\ No newline at end of file
+
+
+@admin.register(NetworkEvent)
+class NetworkEventAdmin(admin.ModelAdmin):
+    list_display = ('run', 'method', 'status', 'resource_type', 'url', 'response_ms', 'created_at')
+    list_filter = ('status', 'resource_type')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(NetworkRollup)
+class NetworkRollupAdmin(admin.ModelAdmin):
+    list_display = ('run', 'step', 'requests', 'failed', 'blocked', 'bytes', 'p50_ms', 'p95_ms', 'created_at')
+    list_filter = ('step',)
+    readonly_fields = ('created_at',)
+
+
+@admin.register(SuggestionCache)
+class SuggestionCacheAdmin(admin.ModelAdmin):
+    list_display = ('query', 'hits', 'misses', 'hit_rate', 'changed', 'refresh_ms', 'refreshed_at')
+    search_fields = ('query',)
+    readonly_fields = ('created_at',)
+
+
+@admin.register(CountryStats)
+class CountryStatsAdmin(admin.ModelAdmin):
+    list_display = ('country', 'attempts', 'successes', 'success_rate', 'mean_ms', 'no_suggestions',
+                    'not_retained', 'last_outcome', 'updated_at')
+    list_filter = ('last_outcome',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,140 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from django.conf import settings
+
+# Chromium features the steps never use; skipping them shortens startup
+LEAN_ARGS = [
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-extensions',
+    '--disable-component-update',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-gpu',
+    '--mute-audio',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+]
+
+# Named chromium.launch() options
+LAUNCH_PROFILES = {
+    # A visible window, as the automation has always run
+    'headed': {'headless': False},
+    # New headless mode: the full Chromium build without a window
+    'headless': {'headless': True, 'channel': 'chromium'},
+    # The stripped-down chromium-headless-shell build (Playwright's headless default)
+    'headless-shell': {'headless': True},
+    # headless-shell plus LEAN_ARGS
+    'lean': {'headless': True, 'args': LEAN_ARGS},
+}
+
+
+def launch_options(profile: str) -> dict:
+    if profile not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile: {profile}")
+    options = dict(LAUNCH_PROFILES[profile])
+    if 'args' in options:
+        options['args'] = list(options['args'])
+    return options
+
+
+def read_endpoint(path: str = None) -> str:
+    """The ws endpoint written by `manage.py browser_server`, or '' if none is running."""
+    path = path or settings.BROWSER_ENDPOINT_FILE
+    if not os.path.exists(path):
+        return ''
+    with open(path) as fh:
+        return fh.read().strip()
+
+
+def launch_browser(playwright, profile: str = 'headed', ws_endpoint: str = '', **overrides):
+    """Attach to a warm browser server, or cold-launch Chromium with a profile.
+
+    overrides are extra chromium.launch() options (ignored when connecting).
+    Returns (browser, startup_ms). Closing a connected browser only
+    disconnects; the server keeps running for the next run.
+    """
+    started = time.monotonic()
+    if ws_endpoint:
+        browser = playwright.chromium.connect(ws_endpoint)
+        label = 'warm connect'
+    else:
+        browser = playwright.chromium.launch(**launch_options(profile), **overrides)
+        label = f'cold launch ({profile})'
+    startup_ms = round((time.monotonic() - started) * 1000)
+    print(f"[Browser] {label} — {startup_ms} ms")
+    return browser, startup_ms
+
+
+def measure_startup(playwright, profile: str = 'headed', ws_endpoint: str = '') -> int:
+    """Milliseconds until a blank page is usable, cold (launch) or warm (connect)."""
+    started = time.monotonic()
+    if ws_endpoint:
+        browser = playwright.chromium.connect(ws_endpoint)
+    else:
+        browser = playwright.chromium.launch(**launch_options(profile))
+    try:
+        context = browser.new_context()
+        context.new_page()
+        elapsed = round((time.monotonic() - started) * 1000)
+        context.close()
+    finally:
+        browser.close()
+    return elapsed
+
+
+class BrowserServer:
+    """A Chromium started with `playwright launch-server`.
+
+    Every thread that wants to drive the browser opens its own Playwright
+    instance and calls `chromium.connect(server.ws_endpoint)`, so several
+    scenarios share one Chromium while each works in its own BrowserContext.
+    """
+
+    def __init__(self, profile: str = 'headed'):
+        self.options = launch_options(profile)
+        self.process = None
+        self.ws_endpoint = ''
+        self._config_path = ''
+
+    def start(self) -> str:
+        fd, self._config_path = tempfile.mkstemp(suffix='.json', prefix='pw-server-')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(self.options, fh)
+
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'playwright', 'launch-server',
+             '--browser', 'chromium', '--config', self._config_path],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        # The driver prints the websocket endpoint once the browser is up
+        line = self.process.stdout.readline().strip()
+        if not line.startswith('ws://'):
+            self.stop()
+            raise RuntimeError(f"Browser server did not start: {line!r}")
+        self.ws_endpoint = line
+        return self.ws_endpoint
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+        if self._config_path and os.path.exists(self._config_path):
+            os.remove(self._config_path)
+        self._config_path = ''
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,62 @@
+import random
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from tracker.instrument import count_db_write
+from tracker.models import CountryStats
+
+# Counter column of each outcome
+OUTCOME_FIELDS = {
+    'selected': 'successes',
+    'no_suggestions': 'no_suggestions',
+    'not_retained': 'not_retained',
+}
+
+
+def order_candidates(countries: list) -> tuple:
+    """Order countries so the ones likely to work quickly come first.
+
+    Thompson sampling: each country draws a success rate from
+    Beta(successes + 1, failures + 1) and is ranked by that rate per ms of
+    its mean attempt time, so unknown and unlucky countries still come
+    first now and then. On top, COUNTRY_EXPLORATION_RATE of the calls
+    return a plain shuffle. Returns (countries, 'explore' | 'exploit').
+    """
+    order = list(countries)
+    if random.random() < settings.COUNTRY_EXPLORATION_RATE:
+        random.shuffle(order)
+        return order, 'explore'
+
+    stats = {s.country: s for s in CountryStats.objects.filter(country__in=order)}
+    measured = [s for s in stats.values() if s.attempts]
+    # Countries never tried are assumed to take the average time
+    default_ms = sum(s.total_ms for s in measured) / sum(s.attempts for s in measured) if measured else 1
+
+    def score(country):
+        s = stats.get(country)
+        if not s or not s.attempts:
+            return random.betavariate(1, 1) / max(default_ms, 1)
+        rate = random.betavariate(s.successes + 1, s.attempts - s.successes + 1)
+        return rate / max(s.total_ms / s.attempts, 1)
+
+    return sorted(order, key=score, reverse=True), 'exploit'
+
+
+def record_attempt(country: str, outcome: str, duration_ms: int):
+    """Add one step01 attempt for a country."""
+    updates = {
+        'attempts': F('attempts') + 1,
+        OUTCOME_FIELDS[outcome]: F(OUTCOME_FIELDS[outcome]) + 1,
+        'total_ms': F('total_ms') + duration_ms,
+        'last_outcome': outcome,
+        'updated_at': timezone.now(),  # update() skips auto_now
+    }
+    count_db_write()
+    if not CountryStats.objects.filter(country=country).update(**updates):
+        stats, created = CountryStats.objects.get_or_create(country=country, defaults={
+            'attempts': 1, OUTCOME_FIELDS[outcome]: 1, 'total_ms': duration_ms, 'last_outcome': outcome,
+        })
+        count_db_write()
+        if not created:
+            CountryStats.objects.filter(pk=stats.pk).update(**updates)
+            count_db_write()
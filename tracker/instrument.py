@@ -0,0 +1,187 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.utils import timezone
+from playwright.sync_api import BrowserContext, ElementHandle, FrameLocator, Keyboard, Locator, Mouse, Page
+from tracker.models import Run, StepMetric
+
+# Objects whose method calls go over the wire to the browser
+_WRAPPED_TYPES = (Page, BrowserContext, Locator, ElementHandle, FrameLocator, Keyboard, Mouse)
+
+# Methods that never leave the Python process
+_LOCAL_METHODS = {'on', 'once', 'remove_listener', 'is_closed', 'set_default_timeout',
+                  'set_default_navigation_timeout'}
+
+_QUERY_METHODS = {'query_selector', 'query_selector_all', 'eval_on_selector',
+                  'eval_on_selector_all', 'count', 'all'}
+
+_current_step = ContextVar('tracker_step_metrics', default=None)
+
+
+class StepRecorder:
+    """Counters for one step; becomes a StepMetric row when the step ends."""
+
+    def __init__(self, step: str):
+        self.step = step
+        self.started = time.monotonic()
+        self.last_lap = self.started
+        self.wait_ms = 0.0
+        self.cdp_calls = 0
+        self.evaluate_calls = 0
+        self.query_calls = 0
+        self.locator_calls = 0
+        self.db_writes = 0
+        self.db_rows = 0
+        # >0 while a waits.settle()/pause() is running, so its own
+        # wait_for calls are not counted twice
+        self.waiting = 0
+
+    def count_call(self, owner, name: str):
+        self.cdp_calls += 1
+        if name.startswith('evaluate') or name.startswith('eval_on'):
+            self.evaluate_calls += 1
+        elif name in _QUERY_METHODS:
+            self.query_calls += 1
+        elif isinstance(owner, Locator):
+            self.locator_calls += 1
+
+    def lap(self) -> int:
+        """Milliseconds since the step started or since the previous lap."""
+        now = time.monotonic()
+        elapsed, self.last_lap = now - self.last_lap, now
+        return round(elapsed * 1000)
+
+    def to_model(self, run: Run, passed: bool, error: str = '') -> StepMetric:
+        return StepMetric(
+            run=run,
+            step=self.step,
+            passed=passed,
+            error=error,
+            wall_ms=round((time.monotonic() - self.started) * 1000),
+            wait_ms=round(self.wait_ms),
+            cdp_calls=self.cdp_calls,
+            evaluate_calls=self.evaluate_calls,
+            query_calls=self.query_calls,
+            locator_calls=self.locator_calls,
+            db_writes=self.db_writes,
+            db_rows=self.db_rows,
+        )
+
+
+def percentile(values: list, pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0–100) of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def current_step() -> StepRecorder:
+    return _current_step.get()
+
+
+class InstrumentedPage:
+    """Proxy that counts browser round trips made through a Playwright object.
+
+    Wraps Page/BrowserContext/Locator/ElementHandle/Keyboard/Mouse and
+    everything they return, so `page.locator(...).first.click()` is
+    counted as one call. Building a locator is local and is not counted.
+    """
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value):
+            return _wrap(value)
+
+        def call(*args, **kwargs):
+            recorder = _current_step.get()
+            started = time.monotonic()
+            result = None
+            try:
+                result = value(*args, **kwargs)
+                return _wrap(result)
+            finally:
+                # Failed calls (e.g. timeouts) still cost a round trip
+                if recorder and name not in _LOCAL_METHODS and not isinstance(result, (Locator, FrameLocator)):
+                    recorder.count_call(self._target, name)
+                    if name.startswith('wait_for') and not recorder.waiting:
+                        recorder.wait_ms += (time.monotonic() - started) * 1000
+
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __repr__(self):
+        return f'InstrumentedPage({self._target!r})'
+
+
+def _wrap(value):
+    if isinstance(value, _WRAPPED_TYPES):
+        return InstrumentedPage(value)
+    if isinstance(value, list) and value and isinstance(value[0], _WRAPPED_TYPES):
+        return [InstrumentedPage(v) for v in value]
+    return value
+
+
+@contextmanager
+def record_wait():
+    """Time a wait from tracker.waits against the current step."""
+    recorder = _current_step.get()
+    started = time.monotonic()
+    if recorder:
+        recorder.waiting += 1
+    try:
+        yield
+    finally:
+        if recorder:
+            recorder.waiting -= 1
+            recorder.wait_ms += (time.monotonic() - started) * 1000
+
+
+def count_db_write(rows: int = 1):
+    recorder = _current_step.get()
+    if recorder:
+        recorder.db_writes += 1
+        recorder.db_rows += rows
+
+
+def start_run(scenario: str) -> Run:
+    return Run.objects.create(scenario=scenario)
+
+
+def finish_run(run: Run, passed: bool, error: str = ''):
+    run.passed = passed
+    run.error = error
+    run.finished_at = timezone.now()
+    run.duration_ms = round((run.finished_at - run.started_at).total_seconds() * 1000)
+    run.save(update_fields=['passed', 'error', 'finished_at', 'duration_ms'])
+
+
+@contextmanager
+def instrument_step(run: Run, step: str):
+    """Collect counters for one step and store them as a StepMetric."""
+    recorder = StepRecorder(step)
+    token = _current_step.set(recorder)
+    passed = False
+    error = ''
+    try:
+        yield recorder
+        passed = True
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        _current_step.reset(token)
+        metric = recorder.to_model(run, passed, error)
+        metric.save()
+        print(f"[Metrics] {step} — wall: {metric.wall_ms} ms | waits: {metric.wait_ms} ms | "
+              f"CDP calls: {metric.cdp_calls} (evaluate {metric.evaluate_calls}, "
+              f"query {metric.query_calls}, locator {metric.locator_calls}) | "
+              f"DB writes: {metric.db_writes} ({metric.db_rows} rows)")
@@ -0,0 +1,170 @@
+import json
+import os
+import random
+from django.core.management.base import BaseCommand, CommandError
+from playwright.sync_api import sync_playwright
+from tracker.browser import LAUNCH_PROFILES, BrowserServer, launch_browser, measure_startup, read_endpoint
+from tracker.instrument import percentile
+from tracker.models import Run, StepMetric
+from tracker.network import NETWORK_PROFILES
+from tracker.runner import run_scenario
+from tracker.screenshots import wait_for_screenshots
+
+PERCENTILES = (50, 95, 99)
+
+
+def _stats(values: list) -> dict:
+    out = {f'p{p}': round(percentile(values, p), 1) for p in PERCENTILES}
+    out['mean'] = round(sum(values) / len(values), 1) if values else 0.0
+    out['n'] = len(values)
+    return out
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the step pipeline against a local target and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', '-k', type=int, default=10,
+                            help='Number of measured pipeline runs')
+        parser.add_argument('--warmup', type=int, default=1,
+                            help='Runs executed first and left out of the report')
+        parser.add_argument('--target', metavar='URL',
+                            help='Start URL, e.g. the stand-in site at http://127.0.0.1:8000/airbnb/')
+        parser.add_argument('--replay-har', metavar='PATH',
+                            help='Serve every run from a recorded HAR (see run_automation --record-har)')
+        parser.add_argument('--network', choices=sorted(NETWORK_PROFILES), default='full')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Re-seed the random choices before every run (needed for HAR replay)')
+        parser.add_argument('--browser-profile', choices=sorted(LAUNCH_PROFILES), default='headless-shell',
+                            help='Launch profile for the benchmark browser')
+        parser.add_argument('--connect', nargs='?', const='auto', default=None, metavar='WS_ENDPOINT',
+                            help='Run against a warm browser from `manage.py browser_server`')
+        parser.add_argument('--startup-samples', type=int, default=0, metavar='N',
+                            help='First time N cold launches and N warm connects to a browser server')
+        parser.add_argument('--output', default='bench_results.json',
+                            help='Where to write the machine-readable report')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['iterations'] and not kwargs['target'] and not kwargs['replay_har']:
+            raise CommandError('Benchmark against a local target: pass --target URL or --replay-har PATH')
+        ws_endpoint = kwargs['connect'] or ''
+        if ws_endpoint == 'auto':
+            ws_endpoint = read_endpoint()
+            if not ws_endpoint:
+                raise CommandError('No browser server is running; start one with `manage.py browser_server`')
+        if kwargs['replay_har'] and not os.path.exists(kwargs['replay_har']):
+            raise CommandError(f"HAR file not found: {kwargs['replay_har']}")
+
+        options = {
+            'network': kwargs['network'],
+            'replay_har': kwargs['replay_har'],
+            'har_not_found': 'abort',
+        }
+        initial_state = {'airbnb_url': kwargs['target']} if kwargs['target'] else {}
+        if kwargs['seed'] is not None or kwargs['replay_har']:
+            # The adaptive country order changes with every run; a seed must replay the same one
+            initial_state['country_selection'] = 'random'
+        # -k 0 with --startup-samples only measures browser startup
+        total = kwargs['warmup'] + kwargs['iterations'] if kwargs['iterations'] else 0
+        summaries = []
+        startup = {}
+
+        with sync_playwright() as p:
+            if kwargs['startup_samples']:
+                startup = self._measure_startup(p, kwargs['browser_profile'], ws_endpoint, kwargs['startup_samples'])
+            browser, startup_ms = launch_browser(p, kwargs['browser_profile'], ws_endpoint)
+            startup['benchmark_browser_ms'] = startup_ms
+            try:
+                for i in range(total):
+                    if kwargs['seed'] is not None:
+                        random.seed(kwargs['seed'])
+                    warm = i < kwargs['warmup']
+                    name = f"bench-{'warmup' if warm else 'run'}-{i + 1:03d}"
+                    summary = run_scenario(browser, name, initial_state, options)
+                    status = 'PASS' if summary['passed'] else 'FAIL'
+                    self.stdout.write(f"  [{status}] {name} — {summary['duration']}s")
+                    if not warm:
+                        summaries.append(summary)
+            finally:
+                browser.close()
+                wait_for_screenshots()
+
+        report = self._build_report(summaries, kwargs)
+        report['startup'] = startup
+        with open(kwargs['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        self._print_report(report)
+        self.stdout.write(self.style.SUCCESS(f"Benchmark written to {kwargs['output']}"))
+
+    def _measure_startup(self, p, profile: str, ws_endpoint: str, samples: int) -> dict:
+        """Time cold launches against warm connects, each until a blank page is open."""
+        self.stdout.write(f'Measuring browser startup ({samples} samples each)')
+        cold = [measure_startup(p, profile) for _ in range(samples)]
+        if ws_endpoint:
+            warm = [measure_startup(p, ws_endpoint=ws_endpoint) for _ in range(samples)]
+        else:
+            # No daemon running: start a throwaway server just for the warm samples
+            with BrowserServer(profile) as server:
+                warm = [measure_startup(p, ws_endpoint=server.ws_endpoint) for _ in range(samples)]
+        return {'profile': profile, 'cold_ms': _stats(cold), 'warm_ms': _stats(warm)}
+
+    def _build_report(self, summaries: list, kwargs: dict) -> dict:
+        run_ids = [s['run_id'] for s in summaries if s['run_id']]
+        runs = {r.pk: r for r in Run.objects.filter(pk__in=run_ids)}
+        metrics = list(StepMetric.objects.filter(run_id__in=run_ids).order_by('run_id', 'id'))
+
+        steps = {}
+        db_writes_per_run = {run_id: 0 for run_id in run_ids}
+        db_rows_per_run = {run_id: 0 for run_id in run_ids}
+        for m in metrics:
+            entry = steps.setdefault(m.step, {'wall_ms': [], 'wait_ms': [], 'cdp_calls': []})
+            entry['wall_ms'].append(m.wall_ms)
+            entry['wait_ms'].append(m.wait_ms)
+            entry['cdp_calls'].append(m.cdp_calls)
+            db_writes_per_run[m.run_id] += m.db_writes
+            db_rows_per_run[m.run_id] += m.db_rows
+
+        return {
+            'config': {
+                'iterations': kwargs['iterations'],
+                'warmup': kwargs['warmup'],
+                'target': kwargs['target'],
+                'replay_har': kwargs['replay_har'],
+                'network': kwargs['network'],
+                'seed': kwargs['seed'],
+                'browser_profile': kwargs['browser_profile'],
+                'connect': bool(kwargs['connect']),
+            },
+            'runs': len(summaries),
+            'passed': sum(1 for s in summaries if s['passed']),
+            'end_to_end_ms': _stats([runs[i].duration_ms for i in run_ids if i in runs]),
+            'steps': {
+                step: {key: _stats(values) for key, values in entry.items()}
+                for step, entry in steps.items()
+            },
+            'db_writes_per_run': _stats(list(db_writes_per_run.values())),
+            'db_rows_per_run': _stats(list(db_rows_per_run.values())),
+            'failures': [s for s in summaries if not s['passed']],
+        }
+
+    def _print_report(self, report: dict):
+        startup = report['startup']
+        if 'cold_ms' in startup:
+            cold, warm = startup['cold_ms'], startup['warm_ms']
+            self.stdout.write(
+                f"Browser startup ({startup['profile']})  cold p50 {cold['p50']} ms | p95 {cold['p95']} ms  "
+                f"vs warm p50 {warm['p50']} ms | p95 {warm['p95']} ms"
+            )
+        e2e = report['end_to_end_ms']
+        self.stdout.write(f"Runs passed: {report['passed']}/{report['runs']}")
+        self.stdout.write(f"End-to-end  p50 {e2e['p50']} ms | p95 {e2e['p95']} ms | p99 {e2e['p99']} ms")
+        for step, entry in report['steps'].items():
+            wall = entry['wall_ms']
+            cdp = entry['cdp_calls']
+            self.stdout.write(
+                f"  {step:<8} p50 {wall['p50']} ms | p95 {wall['p95']} ms | p99 {wall['p99']} ms | "
+                f"CDP calls p50 {cdp['p50']} | p99 {cdp['p99']}"
+            )
+        writes = report['db_writes_per_run']
+        self.stdout.write(f"DB writes per run  p50 {writes['p50']} | p95 {writes['p95']} | p99 {writes['p99']}")
@@ -0,0 +1,41 @@
+import os
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tracker.browser import LAUNCH_PROFILES, BrowserServer
+
+
+class Command(BaseCommand):
+    help = 'Keep a Chromium server running so automation runs can connect instead of launching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--browser-profile', choices=sorted(LAUNCH_PROFILES), default='headless-shell',
+                            help='Launch profile of the long-lived browser')
+        parser.add_argument('--endpoint-file', default=None,
+                            help='Where to publish the ws endpoint (default: settings.BROWSER_ENDPOINT_FILE)')
+
+    def handle(self, *args, **kwargs):
+        endpoint_file = kwargs['endpoint_file'] or settings.BROWSER_ENDPOINT_FILE
+        server = BrowserServer(kwargs['browser_profile'])
+
+        started = time.monotonic()
+        ws_endpoint = server.start()
+        startup_ms = round((time.monotonic() - started) * 1000)
+        with open(endpoint_file, 'w') as fh:
+            fh.write(ws_endpoint)
+
+        self.stdout.write(f"[Browser] server up ({kwargs['browser_profile']}) in {startup_ms} ms at {ws_endpoint}")
+        self.stdout.write(f'Endpoint written to {endpoint_file}; connect with `run_automation --connect`')
+
+        # Turn SIGTERM into the same clean shutdown as Ctrl+C
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.process.wait()
+            self.stderr.write('Browser server exited')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping browser server')
+        finally:
+            server.stop()
+            if os.path.exists(endpoint_file):
+                os.remove(endpoint_file)
@@ -0,0 +1,204 @@
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Exists, Max, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce, Length
+from django.utils import timezone
+from tracker.models import ConsoleEvent, NetworkEvent, NetworkRollup, Result, Run, StepMetric
+from tracker.screenshots import SCREENSHOT_DIR
+
+# Children before Run, so every row is archived before a cascade could remove it
+RETENTION_MODELS = [Result, StepMetric, ConsoleEvent, NetworkEvent, NetworkRollup, Run]
+
+# VACUUM only pays off once this share of the SQLite file is free pages
+VACUUM_FREE_RATIO = 0.1
+
+
+def _expired(model, cutoff):
+    if model is not Run:
+        return model.objects.filter(created_at__lt=cutoff)
+    runs = Run.objects.filter(Q(finished_at__lt=cutoff) | Q(finished_at=None, started_at__lt=cutoff))
+    # Never let the cascade take rows that are still inside the window
+    for child in RETENTION_MODELS:
+        if child is not Run:
+            runs = runs.filter(~Exists(child.objects.filter(run=OuterRef('pk'), created_at__gte=cutoff)))
+    return runs
+
+
+def _text_bytes(queryset) -> int:
+    """Approximate size of the rows: the summed length of their text columns."""
+    fields = [f.name for f in queryset.model._meta.concrete_fields
+              if f.get_internal_type() in ('CharField', 'TextField')]
+    if not fields:
+        return 0
+    total = sum((Coalesce(Length(name), 0) for name in fields[1:]), Coalesce(Length(fields[0]), 0))
+    return queryset.order_by().aggregate(size=Sum(total))['size'] or 0
+
+
+def _archived_ids(path: str) -> set:
+    """Ids already in an archive file, e.g. from a run that stopped before its delete."""
+    if not os.path.exists(path):
+        return set()
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return {json.loads(line)['id'] for line in f}
+
+
+def _archive(archive_dir: str, model, rows: list, archived: dict) -> int:
+    """Append rows to <archive_dir>/<table>/<YYYY-MM-DD>.ndjson.gz; returns bytes written.
+
+    archived maps each file path to the ids it holds, read once per file,
+    so rows that were archived but never deleted are not written twice.
+    """
+    date_field = 'started_at' if model is Run else 'created_at'
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row[date_field].date().isoformat(), []).append(row)
+
+    written = 0
+    table_dir = os.path.join(archive_dir, model._meta.db_table)
+    os.makedirs(table_dir, exist_ok=True)
+    for day, day_rows in by_day.items():
+        path = os.path.join(table_dir, f'{day}.ndjson.gz')
+        if path not in archived:
+            archived[path] = _archived_ids(path)
+        day_rows = [row for row in day_rows if row['id'] not in archived[path]]
+        if not day_rows:
+            continue
+        archived[path].update(row['id'] for row in day_rows)
+        before = os.path.getsize(path) if os.path.exists(path) else 0
+        # Each batch is its own gzip member; gzip readers concatenate them
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            for row in day_rows:
+                f.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+        written += os.path.getsize(path) - before
+    return written
+
+
+def _unreferenced_screenshots(grace_seconds: int, kept_results=None):
+    """Files under SCREENSHOT_DIR no Result points at, older than the grace period.
+
+    kept_results limits the Results that count as references; a dry run
+    passes the rows that would survive the prune.
+    """
+    results = Result.objects.all() if kept_results is None else kept_results
+    referenced = set(
+        results.exclude(screenshot='').order_by().values_list('screenshot', flat=True).distinct().iterator()
+    )
+    referenced = {os.path.normpath(name) for name in referenced}
+    newest = time.time() - grace_seconds
+    for root, _, files in os.walk(SCREENSHOT_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.normpath(os.path.relpath(path, SCREENSHOT_DIR))
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # Recent files may belong to rows still sitting in a ResultBuffer
+            if relative not in referenced and stat.st_mtime < newest:
+                yield path, stat.st_size
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete old results, remove unreferenced screenshots and compact the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Keep rows newer than this many days')
+        parser.add_argument('--archive-dir', default='archive',
+                            help='Where compressed NDJSON archives are written')
+        parser.add_argument('--no-archive', action='store_true',
+                            help='Delete without writing archives')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows archived and deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so writers get the lock')
+        parser.add_argument('--screenshot-grace', type=int, default=60,
+                            help='Leave screenshots written in the last N minutes alone')
+        parser.add_argument('--no-vacuum', action='store_true',
+                            help='Skip VACUUM (it locks the SQLite database while it runs)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report how many rows and bytes would be reclaimed')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['days'] < 0 or kwargs['batch_size'] < 1:
+            raise CommandError('--days must be >= 0 and --batch-size >= 1')
+
+        cutoff = timezone.now() - timedelta(days=kwargs['days'])
+        dry_run = kwargs['dry_run']
+        self.stdout.write(f"{'[Dry run] ' if dry_run else ''}Pruning rows older than {cutoff:%Y-%m-%d %H:%M} UTC")
+
+        deleted = 0
+        for model in RETENTION_MODELS:
+            expired = _expired(model, cutoff)
+            if dry_run:
+                rows = expired.count()
+                deleted += rows
+                self.stdout.write(f"  {model.__name__}: {rows} rows | ~{_text_bytes(expired) // 1024} KB of text")
+                continue
+            rows, archived = self._prune(model, expired, kwargs)
+            deleted += rows
+            self.stdout.write(f"  {model.__name__}: deleted {rows} rows | archived {archived // 1024} KB")
+
+        files = 0
+        size = 0
+        # Nothing was deleted in a dry run, so leave the expired rows out by hand
+        kept = Result.objects.exclude(pk__in=_expired(Result, cutoff).values('pk')) if dry_run else None
+        for path, file_size in _unreferenced_screenshots(kwargs['screenshot_grace'] * 60, kept):
+            if not dry_run:
+                os.remove(path)
+            files += 1
+            size += file_size
+        action = 'would remove' if dry_run else 'removed'
+        self.stdout.write(f"  Screenshots: {action} {files} unreferenced files | {size // 1024} KB")
+
+        if not dry_run and deleted:
+            self._compact(vacuum=not kwargs['no_vacuum'])
+
+    def _prune(self, model, expired, kwargs) -> tuple:
+        """Archive and delete in id-ordered batches, each in its own short transaction."""
+        rows = 0
+        archived = 0
+        archived_ids = {}
+        # Bounding the id range keeps each batch query from re-scanning newer rows
+        last_id = 0
+        max_id = expired.order_by().aggregate(max_id=Max('id'))['max_id'] or 0
+        while True:
+            batch = list(
+                expired.filter(id__gt=last_id, id__lte=max_id).order_by('id').values()[:kwargs['batch_size']]
+            )
+            if not batch:
+                break
+            if not kwargs['no_archive']:
+                archived += _archive(kwargs['archive_dir'], model, batch, archived_ids)
+            model.objects.filter(id__in=[row['id'] for row in batch]).delete()
+            rows += len(batch)
+            last_id = batch[-1]['id']
+            time.sleep(kwargs['pause'])
+        return rows, archived
+
+    def _compact(self, vacuum: bool):
+        tables = [model._meta.db_table for model in RETENTION_MODELS]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute("SELECT name FROM sqlite_master WHERE name = 'tracker_result_fts'")
+                if cursor.fetchone():
+                    cursor.execute("INSERT INTO tracker_result_fts(tracker_result_fts) VALUES ('optimize')")
+                cursor.execute('PRAGMA page_count')
+                pages = cursor.fetchone()[0]
+                cursor.execute('PRAGMA freelist_count')
+                free = cursor.fetchone()[0]
+                if vacuum and pages and free / pages >= VACUUM_FREE_RATIO:
+                    started = time.monotonic()
+                    cursor.execute('VACUUM')
+                    self.stdout.write(f"  VACUUM reclaimed {free} pages in {time.monotonic() - started:.1f}s")
+                cursor.execute('ANALYZE')
+            elif connection.vendor == 'postgresql':
+                for table in tables:
+                    cursor.execute(f'VACUUM ANALYZE "{table}"' if vacuum else f'ANALYZE "{table}"')
+        self.stdout.write('  Statistics refreshed (ANALYZE)')
@@ -1,28 +1,327 @@
-from django.core.management.base import BaseCommand
+import argparse
+import os
+import random
+import re
+import signal
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
 from playwright.sync_api import sync_playwright
-from tracker.steps import step01, step02, step03, step04, step05, step06
-from tracker.monitor import attach_console_listener, attach_network_listener
+from tracker.browser import LAUNCH_PROFILES, BrowserServer, launch_browser, read_endpoint
+from tracker.monitor import MONITOR_MODES, stop_event_writer
+from tracker.network import NETWORK_PROFILES
+from tracker.pool import run_sharded
+from tracker.runner import close_context, open_context, run_concurrent, run_scenario, run_steps
+from tracker.screenshots import wait_for_screenshots
+from tracker.services import ResultBuffer, buffered_results, save_result, scenario_state
+from tracker.steps.step01 import shard_countries
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def duration(value: str) -> float:
+    """argparse type for '90', '90s', '10m' or '1h'; returns seconds."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smh]?)', value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration {value!r}, use e.g. 30s, 10m or 1h")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or 's']
 
 
 class Command(BaseCommand):
     help = 'Run Airbnb end-to-end automation'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='Number of scenarios to run at the same time in one browser',
+        )
+        parser.add_argument(
+            '--scenarios', type=int, default=None,
+            help='Total number of scenarios to run (defaults to --concurrency or --processes)',
+        )
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Number of worker processes, each with its own browser',
+        )
+        parser.add_argument(
+            '--network', choices=sorted(NETWORK_PROFILES), default='full',
+            help='Resource-blocking profile applied to every browser context',
+        )
+        parser.add_argument(
+            '--record-har', metavar='PATH',
+            help='Record the whole session (requests and bodies) to a HAR file',
+        )
+        parser.add_argument(
+            '--replay-har', metavar='PATH',
+            help='Serve responses from a recorded HAR instead of the live site',
+        )
+        parser.add_argument(
+            '--har-not-found', choices=['abort', 'fallback'], default='abort',
+            help="Requests missing from the replayed HAR: 'abort' keeps the run offline, "
+                 "'fallback' sends them to the network",
+        )
+        parser.add_argument(
+            '--monitor', choices=MONITOR_MODES, default='off',
+            help='Store console and network events: errors only, non-2xx responses or everything',
+        )
+        parser.add_argument(
+            '--monitor-sample', type=int, default=1, metavar='N',
+            help='Keep one in every N network events that pass the --monitor filter',
+        )
+        parser.add_argument(
+            '--no-search-api', action='store_true',
+            help='Scrape listings from the rendered cards only, ignoring the search API responses',
+        )
+        parser.add_argument(
+            '--browser-profile', choices=sorted(LAUNCH_PROFILES), default='headed',
+            help='How Chromium is launched: headed window, headless, headless-shell or lean',
+        )
+        parser.add_argument(
+            '--connect', nargs='?', const='auto', default=None, metavar='WS_ENDPOINT',
+            help='Attach to a warm browser from `manage.py browser_server` instead of launching one '
+                 '(endpoint read from settings.BROWSER_ENDPOINT_FILE when omitted)',
+        )
+        parser.add_argument(
+            '--detail-pages', type=int, nargs='?', const=0, default=None, metavar='N',
+            help='Step 06 scrapes the detail page of every listing found (or the first N) '
+                 'instead of one random listing',
+        )
+        parser.add_argument(
+            '--detail-concurrency', type=int, default=4, metavar='K',
+            help='Detail pages open at once with --detail-pages',
+        )
+        parser.add_argument(
+            '--country-selection', choices=['adaptive', 'random'], default=None,
+            help='Order step 01 tries countries in: learned from past attempts, or shuffled '
+                 '(default: adaptive; random with --seed/--replay-har)',
+        )
+        parser.add_argument(
+            '--no-suggestion-cache', action='store_true',
+            help='Always type the location slowly instead of reusing a fresh cached autosuggest list',
+        )
+        parser.add_argument(
+            '--fast-search', action='store_true',
+            help='Skip the date and guest pickers (steps 03/04) and open the results URL directly',
+        )
+        parser.add_argument(
+            '--crawl-pages', type=int, default=None, metavar='N',
+            help='Step 05 follows the results pagination for up to N pages (0 = until the last page)',
+        )
+        parser.add_argument(
+            '--crawl-listings', type=int, default=None, metavar='N',
+            help='Stop the results crawl once N unique listings are stored',
+        )
+        parser.add_argument(
+            '--every', type=duration, default=None, metavar='DURATION',
+            help='Keep running and start the pipeline again every DURATION (e.g. 10m)',
+        )
+        parser.add_argument(
+            '--jitter', type=duration, default=0, metavar='DURATION',
+            help='Shift each --every start by a random amount of up to +/- DURATION',
+        )
+        parser.add_argument(
+            '--max-runs', type=int, default=None, metavar='N',
+            help='Stop --every after N iterations (default: run until SIGTERM/Ctrl+C)',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Seed the random choices (country, dates, guests) so a replay requests the same URLs',
+        )
+
     def handle(self, *args, **kwargs):
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            context = browser.new_context()
-            page = context.new_page()
+        concurrency = max(1, kwargs['concurrency'])
+        processes = max(1, kwargs['processes'])
+        total = kwargs['scenarios'] or max(concurrency, processes)
+        options = {
+            'network': kwargs['network'],
+            'record_har': kwargs['record_har'],
+            'replay_har': kwargs['replay_har'],
+            'har_not_found': kwargs['har_not_found'],
+            'monitor': kwargs['monitor'],
+            'monitor_sample': max(1, kwargs['monitor_sample']),
+            'search_api': not kwargs['no_search_api'],
+        }
+
+        repeat = kwargs['every'] is not None
+        if repeat and (processes > 1 or total > 1):
+            raise CommandError('--every repeats a single scenario; drop --concurrency/--processes/--scenarios')
+        if repeat and options['record_har']:
+            raise CommandError('--record-har cannot be combined with --every')
+        if options['record_har'] and (processes > 1 or total > 1):
+            raise CommandError('--record-har records a single scenario; drop --concurrency/--processes')
+        if options['replay_har'] and not os.path.exists(options['replay_har']):
+            raise CommandError(f"HAR file not found: {options['replay_har']}")
+        if options['record_har']:
+            os.makedirs(os.path.dirname(os.path.abspath(options['record_har'])), exist_ok=True)
+        if kwargs['seed'] is not None:
+            random.seed(kwargs['seed'])
+        # Per-scenario state read by the steps
+        self.step_state = {}
+        if kwargs['detail_pages'] is not None:
+            self.step_state['detail_pages'] = str(max(0, kwargs['detail_pages']))
+            self.step_state['detail_concurrency'] = str(max(1, kwargs['detail_concurrency']))
+        # The adaptive order depends on CountryStats, which every run changes,
+        # so only the shuffle lets --seed reproduce a recorded run
+        reproducible = kwargs['seed'] is not None or bool(options['replay_har'])
+        if reproducible and kwargs['country_selection'] == 'adaptive':
+            raise CommandError('--country-selection adaptive cannot be combined with --seed/--replay-har')
+        if reproducible or kwargs['country_selection'] == 'random':
+            self.step_state['country_selection'] = 'random'
+        if kwargs['no_suggestion_cache']:
+            self.step_state['suggestion_cache'] = 'off'
+        if kwargs['fast_search']:
+            self.step_state['fast_search'] = '1'
+        if kwargs['crawl_pages'] is not None or kwargs['crawl_listings'] is not None:
+            # 0 pages means "no page limit"; crawling always goes past page 1
+            self.step_state['crawl_pages'] = str(max(0, kwargs['crawl_pages'] or 0))
+            self.step_state['crawl_listings'] = str(max(0, kwargs['crawl_listings'] or 0))
+        profile = kwargs['browser_profile']
+        ws_endpoint = kwargs['connect'] or ''
+        if ws_endpoint == 'auto':
+            ws_endpoint = read_endpoint()
+            if not ws_endpoint:
+                raise CommandError('No browser server is running; start one with `manage.py browser_server`')
 
-            attach_console_listener(page)
-            attach_network_listener(page)
+        try:
+            if repeat:
+                self._run_repeat(options, profile, ws_endpoint, kwargs['every'], kwargs['jitter'],
+                                 kwargs['max_runs'])
+            elif processes > 1:
+                self._run_sharded(processes, total, options, profile, ws_endpoint)
+            elif concurrency == 1 and total == 1:
+                self._run_single(options, profile, ws_endpoint)
+            else:
+                self._run_many(concurrency, total, options, profile, ws_endpoint)
+        finally:
+            # Screenshots and monitor events are written in the background
+            wait_for_screenshots()
+            stop_event_writer()
 
+        self.stdout.write(self.style.SUCCESS('Automation complete'))
+
+    def _run_single(self, options: dict, profile: str, ws_endpoint: str):
+        with sync_playwright() as p:
+            browser, _ = launch_browser(p, profile, ws_endpoint)
+
+            buffer = ResultBuffer()
             try:
-                step01.run(page)
-                step03.run(page)
-                step04.run(page)
-                step05.run(page)
-                step06.run(page)
+                with scenario_state(**self.step_state), buffered_results(buffer):
+                    session = open_context(browser, options)
+                    try:
+                        run_steps(session.page)
+                    finally:
+                        close_context(session)
             finally:
+                buffer.flush()
                 browser.close()
+            self.stdout.write(f'Results written: {buffer.written}')
+            if options['record_har']:
+                self.stdout.write(f"HAR recorded to {options['record_har']}")
+
+    def _run_repeat(self, options: dict, profile: str, ws_endpoint: str, every: float, jitter: float,
+                    max_runs: int):
+        """Run the pipeline on a schedule with one Playwright driver and one browser.
+
+        Every iteration gets a fresh BrowserContext and scenario state. SIGTERM
+        or Ctrl+C lets the running iteration finish, then the loop exits.
+        """
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            if not stop.is_set():
+                self.stdout.write('Stop requested — finishing the current iteration')
+            stop.set()
+
+        previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        # By default Playwright closes a launched Chromium on these signals,
+        # which would cut the running iteration short
+        launch = {'handle_sigint': False, 'handle_sigterm': False}
+        summaries = []
+        try:
+            with sync_playwright() as p:
+                browser, _ = launch_browser(p, profile, ws_endpoint, **launch)
+                try:
+                    while not stop.is_set() and (max_runs is None or len(summaries) < max_runs):
+                        if not browser.is_connected():
+                            self.stdout.write('Browser went away, starting a new one')
+                            browser, _ = launch_browser(p, profile, ws_endpoint, **launch)
+                        started = time.monotonic()
+                        name = f'repeat-{len(summaries) + 1:04d}'
+                        summary = run_scenario(browser, name, self.step_state, options)
+                        summaries.append(summary)
+                        self._record_iteration(summary)
+
+                        if max_runs is not None and len(summaries) >= max_runs:
+                            break
+                        delay = max(0.0, every + random.uniform(-jitter, jitter) - (time.monotonic() - started))
+                        self.stdout.write(f'[Repeat] next iteration in {delay:.0f}s')
+                        stop.wait(delay)
+                finally:
+                    browser.close()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        self._report(summaries)
+
+    def _record_iteration(self, summary: dict):
+        """Print and store how long one scheduled iteration took, context setup included."""
+        status = 'PASS' if summary['passed'] else 'FAIL'
+        self.stdout.write(f"[Repeat] {summary['scenario']} [{status}] — {summary['duration']}s")
+        with scenario_state(scenario=summary['scenario'], run_id=str(summary['run_id'] or '')):
+            save_result('Repeat Iteration', '', summary['passed'],
+                        f"Iteration took {summary['duration']}s{' — ' + summary['error'] if summary['error'] else ''}")
+
+    def _build_scenarios(self, total: int) -> list:
+        """Name each scenario and give it its own slice of countries to try first."""
+        shards = shard_countries(total)
+        return [
+            (f'scenario-{i + 1:02d}',
+             {**self.step_state, 'candidate_countries': '|||'.join(shards[i % len(shards)])})
+            for i in range(total)
+        ]
+
+    def _run_many(self, concurrency: int, total: int, options: dict, profile: str, ws_endpoint: str):
+        scenarios = self._build_scenarios(total)
+        self.stdout.write(f'Running {total} scenarios, {concurrency} at a time')
+
+        if ws_endpoint:
+            summaries = run_concurrent(ws_endpoint, scenarios, concurrency, options)
+        else:
+            with BrowserServer(profile) as server:
+                summaries = run_concurrent(server.ws_endpoint, scenarios, concurrency, options)
+
+        self._report(summaries)
+
+    def _run_sharded(self, processes: int, total: int, options: dict, profile: str, ws_endpoint: str):
+        scenarios = self._build_scenarios(total)
+        self.stdout.write(f'Running {total} scenarios across {processes} processes')
+
+        workers = run_sharded(scenarios, processes, profile, ws_endpoint, options)
+
+        for w in workers:
+            done = w['scenarios']
+            passed = sum(1 for s in done if s['passed'])
+            line = f"Worker {w['worker']} (pid {w['pid']}): {passed}/{len(done)} passed in {w['duration']}s"
+            if w['error']:
+                line += f" — {w['error']}"
+            self.stdout.write(line)
+
+        self._report([s for w in workers for s in w['scenarios']])
 
-        self.stdout.write(self.style.SUCCESS('Automation complete'))
\ No newline at end of file
+    def _report(self, summaries: list):
+        summaries = sorted(summaries, key=lambda s: s['scenario'])
+        passed = sum(1 for s in summaries if s['passed'])
+        for s in summaries:
+            status = 'PASS' if s['passed'] else 'FAIL'
+            line = f"  [{status}] {s['scenario']} — {s['duration']}s"
+            if s['error']:
+                line += f" — {s['error']}"
+            self.stdout.write(line)
+        self.stdout.write(f'Scenarios passed: {passed}/{len(summaries)}')
+        if summaries:
+            durations = [s['duration'] for s in summaries]
+            self.stdout.write(
+                f'Duration — min: {min(durations)}s | max: {max(durations)}s | '
+                f'mean: {sum(durations) / len(durations):.2f}s'
+            )
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_result_delete_consolelog_delete_listingitem_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Run',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scenario', models.CharField(blank=True, max_length=100)),
+                ('passed', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StepMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step', models.CharField(max_length=50)),
+                ('passed', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True)),
+                ('wall_ms', models.PositiveIntegerField(default=0)),
+                ('wait_ms', models.PositiveIntegerField(default=0)),
+                ('cdp_calls', models.PositiveIntegerField(default=0)),
+                ('evaluate_calls', models.PositiveIntegerField(default=0)),
+                ('query_calls', models.PositiveIntegerField(default=0)),
+                ('locator_calls', models.PositiveIntegerField(default=0)),
+                ('db_writes', models.PositiveIntegerField(default=0)),
+                ('db_rows', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='step_metrics', to='tracker.run')),
+            ],
+            options={
+                'ordering': ['run', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_run_stepmetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsoleEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(max_length=20)),
+                ('text', models.CharField(max_length=1000)),
+                ('url', models.URLField(blank=True, max_length=2000)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='console_events', to='tracker.run')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NetworkEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('status', models.PositiveSmallIntegerField(default=0)),
+                ('resource_type', models.CharField(max_length=20)),
+                ('url', models.URLField(max_length=2000)),
+                ('response_ms', models.PositiveIntegerField(default=0)),
+                ('failure', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='network_events', to='tracker.run')),
+            ],
+        ),
+    ]
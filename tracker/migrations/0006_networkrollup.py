@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_consoleevent_networkevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('step', models.CharField(max_length=50)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('bytes', models.PositiveBigIntegerField(default=0)),
+                ('p50_ms', models.FloatField(default=0)),
+                ('p95_ms', models.FloatField(default=0)),
+                ('by_resource_type', models.JSONField(default=dict)),
+                ('by_host', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='network_rollups', to='tracker.run')),
+            ],
+        ),
+    ]
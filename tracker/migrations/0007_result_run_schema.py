@@ -0,0 +1,173 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Rows read per batch while grouping; keeps memory flat on large tables
+BATCH_SIZE = 5000
+
+# Every run starts with this check, so it marks where one legacy run ends
+FIRST_TEST_CASE = 'Step 01 - Homepage Load'
+LEGACY_SCENARIO = 'legacy'
+
+# Milliseconds between a row and the previous row of its run, per backend
+DURATION_SQL = {
+    'sqlite': "MAX(CAST(ROUND((julianday(created_at) - julianday(previous_at)) * 86400000) AS INTEGER), 0)",
+    'postgresql': "GREATEST(CAST(ROUND(EXTRACT(EPOCH FROM created_at - previous_at) * 1000) AS INTEGER), 0)",
+}
+
+
+def _step_for(test_case):
+    """'Step 05 - Results Page' -> 'step05'. Step 02 checks run inside step01."""
+    number = test_case[5:7]
+    if not test_case.startswith('Step ') or not number.isdigit():
+        return ''
+    return 'step01' if number == '02' else f'step{number}'
+
+
+def _save_runs(Run, connection, groups):
+    """groups: lists of (id, test_case, passed, comment, created_at), each an id range."""
+    runs = []
+    for rows in groups:
+        errors = [row[3] for row in rows if row[1].endswith(' - Failure')]
+        runs.append(Run(
+            scenario=LEGACY_SCENARIO,
+            passed=all(row[2] for row in rows),
+            error=errors[-1] if errors else '',
+            duration_ms=round((rows[-1][4] - rows[0][4]).total_seconds() * 1000),
+            finished_at=rows[-1][4],
+        ))
+    Run.objects.bulk_create(runs)
+    adapt = connection.ops.adapt_datetimefield_value
+    with connection.cursor() as cursor:
+        # started_at is auto_now_add, so it can only be set after the insert
+        cursor.executemany(
+            "UPDATE tracker_run SET started_at = %s WHERE id = %s",
+            [(adapt(rows[0][4]), run.pk) for run, rows in zip(runs, groups)],
+        )
+        cursor.executemany(
+            "UPDATE tracker_result SET run_id = %s WHERE id BETWEEN %s AND %s",
+            [(run.pk, rows[0][0], rows[-1][0]) for run, rows in zip(runs, groups)],
+        )
+
+
+def backfill_runs(apps, schema_editor):
+    """Group existing results into runs and fill in step, status and duration.
+
+    Rows are read in id order and a new run starts at every
+    "Step 01 - Homepage Load" row, so each run is an id range updated with
+    one statement. Runs that executed concurrently before this migration
+    interleave in the table and are grouped approximately.
+    """
+    Result = apps.get_model('tracker', 'Result')
+    Run = apps.get_model('tracker', 'Run')
+
+    last_id = 0
+    groups = []
+    while True:
+        batch = list(
+            Result.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'test_case', 'passed', 'comment', 'created_at')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for row in batch:
+            if not groups or row[1] == FIRST_TEST_CASE:
+                groups.append([])
+            groups[-1].append(row)
+        last_id = batch[-1][0]
+        # The last group may continue in the next batch
+        if len(groups) > 1:
+            _save_runs(Run, schema_editor.connection, groups[:-1])
+            groups = groups[-1:]
+    if groups:
+        _save_runs(Run, schema_editor.connection, groups)
+
+    Result.objects.update(status=Case(
+        When(test_case__endswith=' - Failure', then=Value('error')),
+        When(passed=True, then=Value('pass')),
+        default=Value('fail'),
+    ))
+    steps = [
+        When(test_case=test_case, then=Value(_step_for(test_case)))
+        for test_case in Result.objects.filter(test_case__startswith='Step ').order_by('test_case')
+        .values_list('test_case', flat=True).distinct()
+        if _step_for(test_case)
+    ]
+    if steps:
+        Result.objects.update(step=Case(*steps, default=Value('')))
+
+    expression = DURATION_SQL.get(schema_editor.connection.vendor)
+    if expression:  # other backends keep 0
+        # A keyed temp table lets the UPDATE join by primary key on both sides
+        schema_editor.execute("CREATE TEMPORARY TABLE tracker_result_durations (id bigint PRIMARY KEY, ms integer)")
+        schema_editor.execute(f"""
+            INSERT INTO tracker_result_durations (id, ms)
+            SELECT id, {expression} FROM (
+                SELECT id, created_at,
+                       LAG(created_at) OVER (PARTITION BY run_id ORDER BY id) AS previous_at
+                FROM tracker_result
+            ) AS ordered WHERE previous_at IS NOT NULL
+        """)
+        schema_editor.execute("""
+            UPDATE tracker_result SET duration_ms = timed.ms
+            FROM tracker_result_durations AS timed WHERE tracker_result.id = timed.id
+        """)
+        schema_editor.execute("DROP TABLE tracker_result_durations")
+
+
+def remove_legacy_runs(apps, schema_editor):
+    Result = apps.get_model('tracker', 'Result')
+    Run = apps.get_model('tracker', 'Run')
+    # Detach first so deleting the runs does not cascade to the results
+    Result.objects.filter(run__scenario=LEGACY_SCENARIO).update(run=None)
+    Run.objects.filter(scenario=LEGACY_SCENARIO).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_networkrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='duration_ms',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='run',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='results', to='tracker.run'),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='status',
+            field=models.CharField(choices=[('pass', 'Pass'), ('fail', 'Fail'), ('error', 'Error')], default='fail', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='step',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        # Backfill before the indexes exist so the updates do not maintain them
+        migrations.RunPython(backfill_runs, remove_legacy_runs),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['run', 'test_case'], name='tracker_res_run_case_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['test_case', 'created_at'], name='tracker_res_case_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['passed', 'created_at'], name='tracker_res_passed_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['-created_at'], name='tracker_res_created_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:19
+
+from django.db import migrations, models
+
+# External-content FTS5 table over tracker_result, kept in sync by triggers
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE tracker_result_fts USING fts5(
+        test_case, comment, url, content='tracker_result', content_rowid='id'
+    )""",
+    """CREATE TRIGGER tracker_result_fts_insert AFTER INSERT ON tracker_result BEGIN
+        INSERT INTO tracker_result_fts(rowid, test_case, comment, url)
+        VALUES (new.id, new.test_case, new.comment, new.url);
+    END""",
+    """CREATE TRIGGER tracker_result_fts_delete AFTER DELETE ON tracker_result BEGIN
+        INSERT INTO tracker_result_fts(tracker_result_fts, rowid, test_case, comment, url)
+        VALUES ('delete', old.id, old.test_case, old.comment, old.url);
+    END""",
+    """CREATE TRIGGER tracker_result_fts_update AFTER UPDATE OF test_case, comment, url ON tracker_result BEGIN
+        INSERT INTO tracker_result_fts(tracker_result_fts, rowid, test_case, comment, url)
+        VALUES ('delete', old.id, old.test_case, old.comment, old.url);
+        INSERT INTO tracker_result_fts(rowid, test_case, comment, url)
+        VALUES (new.id, new.test_case, new.comment, new.url);
+    END""",
+    "INSERT INTO tracker_result_fts(tracker_result_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS tracker_result_fts_insert",
+    "DROP TRIGGER IF EXISTS tracker_result_fts_delete",
+    "DROP TRIGGER IF EXISTS tracker_result_fts_update",
+    "DROP TABLE IF EXISTS tracker_result_fts",
+]
+
+# Expression index matched by tracker.changelist.POSTGRES_SEARCH_SQL
+POSTGRES_FORWARD = [
+    """CREATE INDEX tracker_result_search_idx ON tracker_result
+        USING GIN (to_tsvector('simple', test_case || ' ' || comment || ' ' || url))""",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS tracker_result_search_idx",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE})
+
+
+def fill_test_case_names(apps, schema_editor):
+    Result = apps.get_model('tracker', 'Result')
+    TestCaseName = apps.get_model('tracker', 'TestCaseName')
+    # One pass over the (test_case, created_at) index
+    names = Result.objects.order_by('test_case').values_list('test_case', flat=True).distinct()
+    TestCaseName.objects.bulk_create(
+        [TestCaseName(name=name) for name in names.iterator()], batch_size=500, ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_result_run_schema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestCaseName',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(fill_test_case_names, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_result_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, unique=True)),
+                ('suggestions', models.JSONField(default=list)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+                ('refresh_ms', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['query'],
+            },
+        ),
+    ]
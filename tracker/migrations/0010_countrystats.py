@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_suggestioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CountryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100, unique=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('no_suggestions', models.PositiveIntegerField(default=0)),
+                ('not_retained', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.PositiveBigIntegerField(default=0)),
+                ('last_outcome', models.CharField(blank=True, choices=[('selected', 'Selected'), ('no_suggestions', 'No suggestions'), ('not_retained', 'Not retained')], max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'country stats',
+                'ordering': ['country'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_countrystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networkrollup',
+            name='blocked',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,8 +1,20 @@
 from django.db import models
 
+RESULT_STATUSES = [
+    ('pass', 'Pass'),
+    ('fail', 'Fail'),
+    ('error', 'Error'),  # the step raised; see "Step NN - Failure" rows
+]
+
 
 class Result(models.Model):
+    # The (run, test_case) index covers lookups by run, so no separate FK index
+    run = models.ForeignKey('Run', on_delete=models.CASCADE, null=True, blank=True,
+                            related_name='results', db_index=False)
     test_case = models.CharField(max_length=255)
+    step = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=10, choices=RESULT_STATUSES, default='fail')
+    duration_ms = models.PositiveIntegerField(default=0)  # since the previous result in the step
     url = models.URLField(max_length=2000)
     passed = models.BooleanField(default=False)
     comment = models.TextField(blank=True)
@@ -13,4 +25,160 @@ class Result(models.Model):
         return f"[{'PASS' if self.passed else 'FAIL'}] {self.test_case}"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['run', 'test_case'], name='tracker_res_run_case_idx'),
+            models.Index(fields=['test_case', 'created_at'], name='tracker_res_case_created_idx'),
+            models.Index(fields=['passed', 'created_at'], name='tracker_res_passed_created_idx'),
+            models.Index(fields=['-created_at'], name='tracker_res_created_idx'),
+        ]
+
+
+class TestCaseName(models.Model):
+    """Every distinct Result.test_case, kept up to date on insert for the admin filter."""
+    name = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ['name']
+
+
+class Run(models.Model):
+    scenario = models.CharField(max_length=100, blank=True)
+    passed = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Run #{self.pk} [{'PASS' if self.passed else 'FAIL'}] {self.scenario}"
+
+    class Meta:
+        ordering = ['-started_at']
+
+
+class StepMetric(models.Model):
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, related_name='step_metrics')
+    step = models.CharField(max_length=50)
+    passed = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    wall_ms = models.PositiveIntegerField(default=0)
+    wait_ms = models.PositiveIntegerField(default=0)
+    cdp_calls = models.PositiveIntegerField(default=0)
+    evaluate_calls = models.PositiveIntegerField(default=0)
+    query_calls = models.PositiveIntegerField(default=0)
+    locator_calls = models.PositiveIntegerField(default=0)
+    db_writes = models.PositiveIntegerField(default=0)
+    db_rows = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.step} — {self.wall_ms} ms"
+
+    class Meta:
+        ordering = ['run', 'id']
+
+
+class ConsoleEvent(models.Model):
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, null=True, blank=True, related_name='console_events')
+    level = models.CharField(max_length=20)
+    text = models.CharField(max_length=1000)
+    url = models.URLField(max_length=2000, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"[{self.level}] {self.text[:80]}"
+
+
+class NetworkEvent(models.Model):
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, null=True, blank=True, related_name='network_events')
+    method = models.CharField(max_length=10)
+    status = models.PositiveSmallIntegerField(default=0)  # 0 when the request failed
+    resource_type = models.CharField(max_length=20)
+    url = models.URLField(max_length=2000)
+    response_ms = models.PositiveIntegerField(default=0)  # time to response headers
+    failure = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.method} {self.status} {self.url[:80]}"
+
+
+class NetworkRollup(models.Model):
+    run = models.ForeignKey(Run, on_delete=models.CASCADE, null=True, blank=True, related_name='network_rollups')
+    step = models.CharField(max_length=50)
+    requests = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    blocked = models.PositiveIntegerField(default=0)  # aborted by the network profile, not in failed
+    bytes = models.PositiveBigIntegerField(default=0)
+    p50_ms = models.FloatField(default=0)
+    p95_ms = models.FloatField(default=0)
+    # {"image": {"requests": 120, "bytes": 5123456, "p50_ms": 80.1, "p95_ms": 410.0}, ...}
+    by_resource_type = models.JSONField(default=dict)
+    by_host = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.step} — {self.requests} requests, {self.bytes} bytes"
+
+
+class SuggestionCache(models.Model):
+    """Last autosuggest list step01 saw for a query, reused while it is fresh."""
+    query = models.CharField(max_length=255, unique=True)
+    # [{"text": "Paris, France", "hasIcon": true}, ...]
+    suggestions = models.JSONField(default=list)
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)  # lookups that needed a slow refresh
+    changed = models.PositiveIntegerField(default=0)  # hits whose live list differed
+    refresh_ms = models.PositiveIntegerField(default=0)  # duration of the last slow refresh
+    refreshed_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.query} ({len(self.suggestions)} suggestions)"
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 3) if lookups else 0.0
+
+    class Meta:
+        ordering = ['query']
+
+
+COUNTRY_OUTCOMES = [
+    ('selected', 'Selected'),
+    ('no_suggestions', 'No suggestions'),
+    ('not_retained', 'Not retained'),  # the field was empty after picking a suggestion
+]
+
+
+class CountryStats(models.Model):
+    """Outcomes and time of every step01 attempt to search for a country."""
+    country = models.CharField(max_length=100, unique=True)
+    attempts = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    no_suggestions = models.PositiveIntegerField(default=0)
+    not_retained = models.PositiveIntegerField(default=0)
+    total_ms = models.PositiveBigIntegerField(default=0)  # summed over all attempts
+    last_outcome = models.CharField(max_length=20, choices=COUNTRY_OUTCOMES, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.country} ({self.successes}/{self.attempts})"
+
+    @property
+    def success_rate(self) -> float:
+        return round(self.successes / self.attempts, 3) if self.attempts else 0.0
+
+    @property
+    def mean_ms(self) -> int:
+        return round(self.total_ms / self.attempts) if self.attempts else 0
+
+    class Meta:
+        ordering = ['country']
+        verbose_name_plural = 'country stats'
@@ -1,43 +1,175 @@
-# from tracker.models import Result
-
-
-# def attach_console_listener(page):
-#     """Capture browser console messages and save to DB."""
-#     def handle_console(msg):
-#         try:
-#             Result.objects.create(
-#                 test_case='Console Log',
-#                 url=page.url,
-#                 passed=msg.type not in ('error', 'warning'),
-#                 comment=f'[{msg.type}] {msg.text}',
-#             )
-#         except Exception:
-#             pass
-#     page.on('console', handle_console)
-
-
-# def attach_network_listener(page):
-#     """Capture network responses and save to DB."""
-#     def handle_response(response):
-#         try:
-#             passed = 200 <= response.status < 400
-#             Result.objects.create(
-#                 test_case='Network Request',
-#                 url=response.url[:2000],
-#                 passed=passed,
-#                 comment=f'{response.request.method} {response.status} {response.request.resource_type}',
-#             )
-#         except Exception:
-#             pass
-#     page.on('response', handle_response)
-
-
-
-def attach_console_listener(page):
-    """Console monitoring — logging disabled."""
-    pass
-
-
-def attach_network_listener(page):
-    """Network monitoring — logging disabled."""
-    pass
\ No newline at end of file
+import queue
+import threading
+from django.db import connection
+from tracker.models import ConsoleEvent, NetworkEvent
+
+# What the listeners keep:
+#   off     nothing (default)
+#   errors  console errors/warnings, failed requests and 4xx/5xx responses
+#   non2xx  console errors/warnings, failed requests and every non-2xx response
+#   all     every console message and every response
+MONITOR_MODES = ('off', 'errors', 'non2xx', 'all')
+
+EVENT_QUEUE_SIZE = 10000
+EVENT_BATCH_SIZE = 500
+EVENT_FLUSH_SECONDS = 1.0
+
+_STOP = object()
+
+
+class EventWriter:
+    """Background thread that batch-inserts monitor events.
+
+    Listeners only build an unsaved model instance and put it on a bounded
+    queue, so Playwright's event dispatch never waits on the database.
+    When the queue is full new events are dropped and counted.
+    """
+
+    def __init__(self, maxsize: int = EVENT_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.written = 0
+        self.thread = threading.Thread(target=self._loop, name='monitor-writer', daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def _loop(self):
+        try:
+            while True:
+                try:
+                    item = self.queue.get(timeout=EVENT_FLUSH_SECONDS)
+                except queue.Empty:
+                    continue
+                # Take whatever else is already queued, up to one batch
+                batch = []
+                while item is not _STOP:
+                    batch.append(item)
+                    if len(batch) >= EVENT_BATCH_SIZE:
+                        break
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(batch)
+                if item is _STOP:
+                    return
+        finally:
+            connection.close()
+
+    def _write(self, batch: list):
+        try:
+            for model in (ConsoleEvent, NetworkEvent):
+                rows = [e for e in batch if isinstance(e, model)]
+                if rows:
+                    model.objects.bulk_create(rows)
+            self.written += len(batch)
+        except Exception as e:
+            print(f"[Monitor] Could not write {len(batch)} events: {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_event_writer() -> EventWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = EventWriter()
+        return _writer
+
+
+def stop_event_writer():
+    """Write out every queued event and stop the writer thread."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer:
+        writer.stop()
+        print(f"[Monitor] Events written: {writer.written} | dropped (queue full): {writer.dropped}")
+
+
+def _run_id(state: dict):
+    run_id = state.get('run_id')
+    return int(run_id) if run_id else None
+
+
+def attach_console_listener(page, state: dict, mode: str = 'off'):
+    """Queue browser console messages for the background writer."""
+    if mode == 'off':
+        return
+    writer = get_event_writer()
+
+    def handle_console(msg):
+        level = msg.type
+        if mode != 'all' and level not in ('error', 'warning'):
+            return
+        writer.put(ConsoleEvent(
+            run_id=_run_id(state),
+            level=level[:20],
+            text=msg.text[:1000],
+            url=page.url[:2000],
+        ))
+    page.on('console', handle_console)
+
+
+def attach_network_listener(page, state: dict, mode: str = 'off', sample: int = 1):
+    """Queue network responses and failures for the background writer.
+
+    sample=N keeps one in every N events that pass the mode filter.
+    """
+    if mode == 'off':
+        return
+    writer = get_event_writer()
+    seen = [0]
+
+    def keep(status: int) -> bool:
+        if mode == 'errors' and 0 < status < 400:
+            return False
+        if mode == 'non2xx' and 200 <= status < 300:
+            return False
+        seen[0] += 1
+        return (seen[0] - 1) % max(1, sample) == 0
+
+    def response_ms(request) -> int:
+        # Time to response headers; the body has not finished yet at this point
+        start = request.timing.get('responseStart', -1)
+        return round(start) if start and start > 0 else 0
+
+    def handle_response(response):
+        if not keep(response.status):
+            return
+        request = response.request
+        writer.put(NetworkEvent(
+            run_id=_run_id(state),
+            method=request.method[:10],
+            status=response.status,
+            resource_type=request.resource_type[:20],
+            url=response.url[:2000],
+            response_ms=response_ms(request),
+        ))
+
+    def handle_failed(request):
+        if not keep(0):
+            return
+        writer.put(NetworkEvent(
+            run_id=_run_id(state),
+            method=request.method[:10],
+            status=0,
+            resource_type=request.resource_type[:20],
+            url=request.url[:2000],
+            failure=(request.failure or '')[:200],
+        ))
+
+    page.on('response', handle_response)
+    page.on('requestfailed', handle_failed)
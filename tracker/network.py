@@ -0,0 +1,222 @@
+import re
+from urllib.parse import urlparse
+from tracker.instrument import percentile
+from tracker.models import NetworkRollup
+
+# Third-party hosts the scrapers never need
+TRACKER_HOST_PATTERNS = [
+    r'(^|\.)google-analytics\.com$',
+    r'(^|\.)googletagmanager\.com$',
+    r'(^|\.)doubleclick\.net$',
+    r'(^|\.)facebook\.(net|com)$',
+    r'(^|\.)bat\.bing\.com$',
+    r'(^|\.)tiktok\.com$',
+    r'(^|\.)pinterest\.com$',
+    r'(^|\.)sentry\.io$',
+    r'(^|\.)hotjar\.com$',
+]
+
+# Named profiles: which resource types and hosts are aborted.
+# Blocked images still keep their src attribute, which is all the
+# scrapers read, so `lean` is safe for every step.
+NETWORK_PROFILES = {
+    'full': {
+        'resource_types': set(),
+        'host_patterns': [],
+    },
+    'lean': {
+        'resource_types': {'image', 'media', 'font'},
+        'host_patterns': TRACKER_HOST_PATTERNS,
+    },
+    'text-only': {
+        'resource_types': {'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'},
+        'host_patterns': TRACKER_HOST_PATTERNS + [r'(^|\.)muscache\.com$'],
+    },
+}
+
+
+def _content_length(response) -> int:
+    """The content-length header, 0 when missing; already on the client, so no round trip."""
+    try:
+        return int(response.headers.get('content-length') or 0)
+    except ValueError:
+        return 0
+
+
+def _transfer_size(request, fallback: int) -> int:
+    """Body plus header bytes actually transferred, or `fallback` when Playwright cannot tell.
+
+    Chunked and compressed responses often have no (or a misleading)
+    content-length, so request.sizes() is preferred. It is only valid
+    once the request has finished.
+    """
+    try:
+        sizes = request.sizes()
+        return max(sizes['responseBodySize'], 0) + max(sizes['responseHeadersSize'], 0)
+    except Exception:
+        return fallback
+
+
+class NetworkStats:
+    """Counts what a profile blocked and what was still downloaded."""
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.blocked = 0
+        self.blocked_by_type = {}
+        self.loaded = 0
+        self.loaded_bytes = 0
+        self._pending_bytes = {}
+
+    def on_blocked(self, resource_type: str):
+        self.blocked += 1
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def on_response(self, response):
+        self.loaded += 1
+        self._pending_bytes[response.request] = _content_length(response)
+
+    def on_finished(self, request):
+        self.loaded_bytes += _transfer_size(request, self._pending_bytes.pop(request, 0))
+
+    def on_failed(self, request):
+        self._pending_bytes.pop(request, None)
+
+    def summary(self) -> str:
+        by_type = ', '.join(f'{k}={v}' for k, v in sorted(self.blocked_by_type.items()))
+        return (
+            f'Profile: {self.profile} | Blocked: {self.blocked} ({by_type or "none"}) | '
+            f'Loaded: {self.loaded} | Loaded bytes: {self.loaded_bytes}'
+        )
+
+
+def apply_network_profile(context, profile: str = 'full') -> NetworkStats:
+    """Install the profile's blocking route on a BrowserContext."""
+    if profile not in NETWORK_PROFILES:
+        raise ValueError(f"Unknown network profile: {profile}")
+
+    config = NETWORK_PROFILES[profile]
+    stats = NetworkStats(profile)
+    context.on('response', stats.on_response)
+    context.on('requestfinished', stats.on_finished)
+    context.on('requestfailed', stats.on_failed)
+
+    resource_types = config['resource_types']
+    host_regex = re.compile('|'.join(config['host_patterns'])) if config['host_patterns'] else None
+    if not resource_types and not host_regex:
+        # `full` installs no route at all, so it adds no interception cost
+        return stats
+
+    def handle_route(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ''
+        if request.resource_type in resource_types or (host_regex and host_regex.search(host)):
+            stats.on_blocked(request.resource_type)
+            route.abort('blockedbyclient')
+        else:
+            # fallback() lets later-registered handlers (e.g. HAR replay) see it
+            route.fallback()
+
+    context.route('**/*', handle_route)
+    return stats
+
+
+# Hosts kept per step in a rollup; the rest are summed into "other"
+ROLLUP_MAX_HOSTS = 25
+
+# request.failure of a request the network profile aborted with 'blockedbyclient'
+BLOCKED_FAILURE = 'net::ERR_BLOCKED_BY_CLIENT'
+
+
+class NetworkRollupCollector:
+    """Aggregates request counts, bytes and timings per step in memory.
+
+    Nothing is written while the run is going; to_models() turns each
+    step into one NetworkRollup row at the end. Bytes come from
+    request.sizes() (the content-length header when it is unavailable)
+    and timings from request.timing. Requests the network profile
+    aborted are counted as blocked, not failed.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state
+        self.steps = {}
+        self._pending_bytes = {}
+
+    def attach(self, context):
+        context.on('response', self._on_response)
+        context.on('requestfinished', self._on_finished)
+        context.on('requestfailed', self._on_failed)
+
+    def _bucket(self) -> dict:
+        return self.steps.setdefault(self.state.get('step') or 'setup', {})
+
+    def _on_response(self, response):
+        self._pending_bytes[response.request] = _content_length(response)
+
+    def _add(self, request, size: int, outcome: str = ''):
+        end = request.timing.get('responseEnd', -1)
+        duration = end if end and end > 0 else None
+        host = urlparse(request.url).hostname or ''
+        bucket = self._bucket()
+        for group, key in (('type', request.resource_type), ('host', host), ('total', '')):
+            entry = bucket.setdefault(
+                (group, key), {'requests': 0, 'failed': 0, 'blocked': 0, 'bytes': 0, 'durations': []},
+            )
+            entry['requests'] += 1
+            if outcome:
+                entry[outcome] += 1
+            entry['bytes'] += size
+            if duration is not None:
+                entry['durations'].append(duration)
+
+    def _on_finished(self, request):
+        self._add(request, _transfer_size(request, self._pending_bytes.pop(request, 0)))
+
+    def _on_failed(self, request):
+        blocked = request.failure == BLOCKED_FAILURE
+        self._add(request, self._pending_bytes.pop(request, 0), 'blocked' if blocked else 'failed')
+
+    @staticmethod
+    def _summary(entry: dict) -> dict:
+        return {
+            'requests': entry['requests'],
+            'failed': entry['failed'],
+            'blocked': entry['blocked'],
+            'bytes': entry['bytes'],
+            'p50_ms': round(percentile(entry['durations'], 50), 1),
+            'p95_ms': round(percentile(entry['durations'], 95), 1),
+        }
+
+    def to_models(self, run_id=None) -> list:
+        rows = []
+        for step, bucket in self.steps.items():
+            total = self._summary(bucket[('total', '')])
+            by_type = {key: self._summary(e) for (group, key), e in bucket.items() if group == 'type'}
+            hosts = sorted(
+                ((key, e) for (group, key), e in bucket.items() if group == 'host'),
+                key=lambda item: item[1]['requests'], reverse=True,
+            )
+            by_host = {key: self._summary(e) for key, e in hosts[:ROLLUP_MAX_HOSTS]}
+            if len(hosts) > ROLLUP_MAX_HOSTS:
+                rest = hosts[ROLLUP_MAX_HOSTS:]
+                by_host['other'] = {
+                    'requests': sum(e['requests'] for _, e in rest),
+                    'failed': sum(e['failed'] for _, e in rest),
+                    'blocked': sum(e['blocked'] for _, e in rest),
+                    'bytes': sum(e['bytes'] for _, e in rest),
+                    'hosts': len(rest),
+                }
+            rows.append(NetworkRollup(
+                run_id=run_id,
+                step=step,
+                requests=total['requests'],
+                failed=total['failed'],
+                blocked=total['blocked'],
+                bytes=total['bytes'],
+                p50_ms=total['p50_ms'],
+                p95_ms=total['p95_ms'],
+                by_resource_type=by_type,
+                by_host=by_host,
+            ))
+        return rows
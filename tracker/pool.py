@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import time
+
+# This module is imported by freshly spawned worker processes, so it must
+# not touch Django models at import time; _init_worker() sets Django up.
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+def _run_shard(worker_index: int, scenarios: list, profile: str, ws_endpoint: str, options: dict) -> dict:
+    """Worker body: own browser, own DB connection, scenarios run serially."""
+    from django.db import connection
+    from playwright.sync_api import sync_playwright
+    from tracker.browser import launch_browser
+    from tracker.monitor import stop_event_writer
+    from tracker.runner import run_scenario
+    from tracker.screenshots import wait_for_screenshots
+
+    started = time.monotonic()
+    summaries = []
+    try:
+        with sync_playwright() as p:
+            browser, _ = launch_browser(p, profile, ws_endpoint)
+            try:
+                for name, initial_state in scenarios:
+                    summaries.append(run_scenario(browser, name, initial_state, options))
+            finally:
+                browser.close()
+    finally:
+        wait_for_screenshots()
+        stop_event_writer()
+        connection.close()
+
+    return {
+        'worker': worker_index,
+        'pid': os.getpid(),
+        'duration': round(time.monotonic() - started, 2),
+        'scenarios': summaries,
+        'error': '',
+    }
+
+
+def run_sharded(scenarios: list, processes: int, profile: str = 'headed', ws_endpoint: str = '',
+                options: dict = None) -> list:
+    """Split (name, initial_state) scenarios round-robin across worker processes.
+
+    Each worker launches its own browser with the launch profile, or
+    connects to a running browser server when ws_endpoint is given.
+
+    Returns one summary per worker, each holding its scenario summaries.
+    """
+    processes = max(1, min(processes, len(scenarios)))
+    shards = [scenarios[i::processes] for i in range(processes)]
+
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=processes, initializer=_init_worker) as pool:
+        jobs = [
+            pool.apply_async(_run_shard, (i + 1, shard, profile, ws_endpoint, options))
+            for i, shard in enumerate(shards)
+        ]
+        results = []
+        for i, job in enumerate(jobs):
+            try:
+                results.append(job.get())
+            except Exception as e:
+                # A worker that dies (e.g. browser failed to launch) still
+                # shows up in the report with its scenarios missing
+                results.append({
+                    'worker': i + 1,
+                    'pid': None,
+                    'duration': 0,
+                    'scenarios': [],
+                    'error': f'{type(e).__name__}: {e}',
+                })
+        return results
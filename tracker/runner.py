@@ -0,0 +1,227 @@
+import queue
+import threading
+import time
+from django.db import connection
+from playwright.sync_api import sync_playwright
+from tracker.instrument import InstrumentedPage, finish_run, instrument_step, start_run
+from tracker.monitor import attach_console_listener, attach_network_listener
+from tracker.models import NetworkRollup
+from tracker.network import NetworkRollupCollector, apply_network_profile
+from tracker.search_api import SearchApiCollector
+from tracker.services import (
+    buffered_results, current_state, flush_results, get_state, save_result, scenario_state, set_state,
+    take_screenshot,
+)
+from tracker.steps import fast_search, step01, step03, step04, step05, step06
+from tracker.waits import wait_report
+
+# Step 02 is handled inside step01
+STEPS = [step01, step03, step04, step05, step06]
+
+# --fast-search: dates and guests go straight into the results URL
+FAST_STEPS = [step01, fast_search, step05, step06]
+
+
+def step_name(step) -> str:
+    return step.__name__.rsplit('.', 1)[-1]
+
+
+def run_steps(page):
+    """Drive one page through the whole search pipeline.
+
+    The run and every step are recorded (Run / StepMetric), and the page
+    is wrapped so browser round trips are counted per step.
+    """
+    run = start_run(get_state('scenario') or 'single')
+    set_state('run_id', str(run.pk))
+    page = InstrumentedPage(page)
+    passed = False
+    error = ''
+    try:
+        for step in FAST_STEPS if get_state('fast_search') else STEPS:
+            name = step_name(step)
+            set_state('step', name)
+            with instrument_step(run, name):
+                try:
+                    step.run(page)
+                finally:
+                    flush_results()
+                    _print_wait_savings(name)
+        passed = True
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        _save_failure(page, error)
+        raise
+    finally:
+        _print_wait_savings()
+        finish_run(run, passed, error)
+
+
+def _save_failure(page, error: str):
+    """Keep a screenshot of the page a step failed on."""
+    step = get_state('step')
+    try:
+        screenshot = take_screenshot(page, f'{step}-failure', full_page=False)
+    except Exception:
+        screenshot = ''
+    save_result(f"{step.replace('step', 'Step ')} - Failure", page.url, False, error, screenshot, status='error')
+
+
+def _print_wait_savings(name: str = None):
+    """Compare readiness waits of one step (or the whole run) with the old fixed waits."""
+    report = wait_report()
+    if name:
+        entries = [report[name]] if name in report else []
+    else:
+        entries = list(report.values())
+    if not entries:
+        return
+    fixed = sum(e['fixed_ms'] for e in entries)
+    waited = sum(e['waited_ms'] for e in entries)
+    print(f"[Waits] {name or 'total'} — fixed: {fixed} ms | waited: {waited} ms | "
+          f"saved: {fixed - waited} ms")
+
+
+class ContextSession:
+    """A BrowserContext + page and the probes attached to them."""
+
+    def __init__(self, context, page, network_stats, rollup):
+        self.context = context
+        self.page = page
+        self.network_stats = network_stats
+        self.rollup = rollup
+
+
+def open_context(browser, options: dict = None) -> ContextSession:
+    """Create a BrowserContext + page set up according to the run options.
+
+    Options:
+      network        -- profile name from tracker.network.NETWORK_PROFILES
+      record_har     -- path to write a HAR of the whole session to on close
+      replay_har     -- path of a HAR to serve responses from
+      har_not_found  -- 'abort' (offline) or 'fallback' (live) for requests
+                        missing from the replayed HAR
+      monitor        -- console/network event mode from tracker.monitor.MONITOR_MODES
+      monitor_sample -- keep 1 in N network events
+      search_api     -- parse listings from search API responses (default on)
+    """
+    options = options or {}
+    state = current_state()
+    context_args = {}
+    if options.get('record_har'):
+        context_args['record_har_path'] = options['record_har']
+        context_args['record_har_mode'] = 'full'
+    context = browser.new_context(**context_args)
+
+    if options.get('replay_har'):
+        # Registered first so the blocking profile route below still runs before it
+        context.route_from_har(
+            options['replay_har'],
+            not_found=options.get('har_not_found', 'abort'),
+        )
+
+    network_stats = apply_network_profile(context, options.get('network', 'full'))
+    rollup = NetworkRollupCollector(state)
+    rollup.attach(context)
+    if options.get('search_api', True):
+        SearchApiCollector(state).attach(context)
+    page = context.new_page()
+
+    monitor = options.get('monitor', 'off')
+    attach_console_listener(page, state, monitor)
+    attach_network_listener(page, state, monitor, options.get('monitor_sample', 1))
+    return ContextSession(context, page, network_stats, rollup)
+
+
+def close_context(session: ContextSession):
+    """Record the network profile and per-step rollups, then close the context."""
+    try:
+        summary = session.network_stats.summary()
+        save_result('Network Profile', session.page.url, True, summary, '')
+        print(f"[Network] {summary}")
+
+        run_id = get_state('run_id')
+        rows = session.rollup.to_models(int(run_id) if run_id else None)
+        NetworkRollup.objects.bulk_create(rows)
+        for row in rows:
+            print(f"[Network] {row.step} — {row.requests} requests | {row.bytes} bytes | "
+                  f"p50 {row.p50_ms} ms | p95 {row.p95_ms} ms")
+    finally:
+        session.context.close()
+
+
+def run_scenario(browser, name: str, initial_state: dict = None, options: dict = None) -> dict:
+    """Run the pipeline in a fresh BrowserContext and return a summary."""
+    started = time.monotonic()
+    passed = False
+    error = ''
+
+    with scenario_state(scenario=name, **(initial_state or {})), buffered_results():
+        session = open_context(browser, options)
+        try:
+            run_steps(session.page)
+            passed = True
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            print(f"[{name}] Failed — {error}")
+        finally:
+            close_context(session)
+            run_id = get_state('run_id')
+
+    return {
+        'scenario': name,
+        'run_id': int(run_id) if run_id else None,
+        'passed': passed,
+        'duration': round(time.monotonic() - started, 2),
+        'error': error,
+    }
+
+
+def _scenario_worker(ws_endpoint: str, scenarios: queue.Queue, summaries: list,
+                     lock: threading.Lock, options: dict):
+    """Thread body: own Playwright client, shared browser, one scenario at a time."""
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.connect(ws_endpoint)
+            try:
+                while True:
+                    try:
+                        name, initial_state = scenarios.get_nowait()
+                    except queue.Empty:
+                        break
+                    summary = run_scenario(browser, name, initial_state, options)
+                    with lock:
+                        summaries.append(summary)
+            finally:
+                browser.close()
+    finally:
+        # Each thread holds its own DB connection
+        connection.close()
+
+
+def run_concurrent(ws_endpoint: str, scenarios: list, concurrency: int, options: dict = None) -> list:
+    """Run (name, initial_state) scenarios with up to `concurrency` at a time.
+
+    Playwright's sync API cannot be shared between threads, so each worker
+    thread connects its own client to the same browser server.
+    """
+    pending = queue.Queue()
+    for scenario in scenarios:
+        pending.put(scenario)
+
+    summaries = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=_scenario_worker,
+            args=(ws_endpoint, pending, summaries, lock, options),
+            name=f'scenario-worker-{i + 1}',
+        )
+        for i in range(max(1, min(concurrency, len(scenarios))))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return summaries
@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from PIL import Image
+
+SCREENSHOT_DIR = os.path.join(settings.BASE_DIR, 'screenshots')
+
+FORMATS = {
+    'jpeg': ('JPEG', 'jpg'),
+    'webp': ('WEBP', 'webp'),
+    'png': ('PNG', 'png'),
+}
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='screenshot')
+        return _executor
+
+
+def artifact_path(filename: str) -> str:
+    """Absolute path of a stored screenshot from its Result.screenshot value."""
+    return os.path.join(SCREENSHOT_DIR, filename)
+
+
+def _encode_and_write(raw: bytes, filename: str, fmt: str, quality: int, name: str):
+    started = time.monotonic()
+    path = artifact_path(filename)
+    try:
+        image = Image.open(io.BytesIO(raw))
+        if fmt == 'jpeg':
+            image = image.convert('RGB')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp name first so a half-written file never looks stored
+        tmp_path = f'{path}.tmp'
+        image.save(tmp_path, FORMATS[fmt][0], quality=quality)
+        os.replace(tmp_path, path)
+        print(f"[Screenshot] {name} stored as {filename} — encode+write "
+              f"{(time.monotonic() - started) * 1000:.0f} ms | {os.path.getsize(path) // 1024} KB")
+    except Exception as e:
+        print(f"[Screenshot] {name} could not be stored: {e}")
+    finally:
+        with _lock:
+            _pending.pop(filename, None)
+
+
+def capture(page, name: str, fmt: str = None, quality: int = None, clip: dict = None,
+            full_page: bool = True) -> str:
+    """Capture a screenshot and store it by content hash in the background.
+
+    Only the browser capture happens on the calling thread. Decoding,
+    re-encoding to `fmt` with Pillow and the disk write run in a thread
+    pool. Identical captures map to the same file and are written once.
+    Returns the stored filename, relative to SCREENSHOT_DIR.
+    """
+    fmt = fmt or settings.SCREENSHOT_FORMAT
+    quality = quality or settings.SCREENSHOT_QUALITY
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown screenshot format: {fmt}")
+
+    started = time.monotonic()
+    raw = page.screenshot(full_page=full_page and not clip, clip=clip, type='png')
+    capture_ms = (time.monotonic() - started) * 1000
+
+    digest = hashlib.sha256(raw).hexdigest()
+    filename = os.path.join(digest[:2], f'{digest}.{FORMATS[fmt][1]}')
+
+    executor = _get_executor()
+    with _lock:
+        duplicate = filename in _pending or os.path.exists(artifact_path(filename))
+        if not duplicate:
+            _pending[filename] = executor.submit(
+                _encode_and_write, raw, filename, fmt, quality, name
+            )
+
+    print(f"[Screenshot] {name} — capture {capture_ms:.0f} ms | {len(raw) // 1024} KB raw"
+          f"{' | duplicate, reused' if duplicate else ''}")
+    return filename
+
+
+def wait_for_screenshots(timeout: float = None):
+    """Block until every queued screenshot has been written."""
+    with _lock:
+        futures = list(_pending.values())
+    for future in futures:
+        future.result(timeout=timeout)
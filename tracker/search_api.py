@@ -0,0 +1,123 @@
+import base64
+import re
+from urllib.parse import urlparse
+
+# Search endpoints whose JSON carries the listings shown on the results page
+SEARCH_API_PATTERNS = [
+    r'/api/v3/StaysSearch',
+    r'/api/v3/ExploreSearch',
+    r'/api/v2/explore_tabs',
+]
+
+
+def _room_id(value) -> str:
+    """Numeric room id; newer payloads base64-encode it as 'DemandStayListing:<id>'."""
+    value = str(value or '')
+    if value.isdigit():
+        return value
+    try:
+        decoded = base64.b64decode(value + '=' * (-len(value) % 4)).decode('utf-8')
+    except ValueError:
+        return ''
+    _, _, room_id = decoded.rpartition(':')
+    return room_id if room_id.isdigit() else ''
+
+
+def _price(result: dict) -> str:
+    quote = result.get('pricingQuote') or result.get('pricing_quote') or {}
+    line = ((quote.get('structuredStayDisplayPrice') or result.get('structuredDisplayPrice') or {})
+            .get('primaryLine') or {})
+    price = (line.get('price') or line.get('discountedPrice')
+             or (quote.get('rate') or {}).get('amount_formatted') or '')
+    if price and line.get('qualifier'):
+        price = f"{price} {line['qualifier']}"
+    return price
+
+
+def _pictures(listing: dict, result: dict) -> list:
+    urls = []
+    for picture in listing.get('contextualPictures') or result.get('contextualPictures') or []:
+        urls.append(picture.get('picture'))
+    urls.extend(listing.get('picture_urls') or [])
+    return [url for url in dict.fromkeys(urls) if url]
+
+
+def _iter_results(node):
+    """Search result dicts ({'listing': {...}, pricing...}) anywhere in the payload."""
+    if isinstance(node, dict):
+        if isinstance(node.get('listing'), dict) and ('id' in node['listing'] or 'demandStayListing' in node):
+            yield node
+            return
+        for value in node.values():
+            yield from _iter_results(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_results(value)
+
+
+def parse_search_payload(payload, site_url: str) -> list:
+    """Listings of a search API payload in the shape step05 stores.
+
+    Detail URLs are built as <site_url>/rooms/<id>, where site_url is the
+    API URL up to its '/api/' segment.
+    """
+    listings = []
+    for result in _iter_results(payload):
+        listing = result['listing']
+        room_id = _room_id(listing.get('id') or (result.get('demandStayListing') or {}).get('id'))
+        if not room_id:
+            continue
+        coordinate = listing.get('coordinate') or {}
+        pictures = _pictures(listing, result)
+        item = {
+            'room_id': room_id,
+            'title': listing.get('title') or listing.get('name') or '',
+            'price': _price(result),
+            'rating': str(listing.get('avgRatingLocalized') or listing.get('avg_rating') or ''),
+            'lat': coordinate.get('latitude', listing.get('lat')),
+            'lng': coordinate.get('longitude', listing.get('lng')),
+            'images': pictures,
+            'image_url': pictures[0] if pictures else '',
+            'detail_url': f"{site_url}/rooms/{room_id}",
+        }
+        listings.append({k: v for k, v in item.items() if v not in ('', None, [])})
+    return listings
+
+
+class SearchApiCollector:
+    """Keeps the listings of the newest search API response in the scenario state.
+
+    The results page fetches its listings as JSON before rendering them,
+    so one response parse replaces the per-card DOM queries and also
+    covers cards that are not rendered yet. Only responses requested by a
+    results page (/s/...) count. state['search_api_listings'] is replaced
+    by every matching response and cleared before each search navigation
+    (step04, fast_search, the step05 crawl).
+    """
+
+    def __init__(self, state: dict, patterns: list = None):
+        self.state = state
+        self.regex = re.compile('|'.join(patterns or SEARCH_API_PATTERNS))
+
+    def attach(self, context):
+        context.on('response', self._on_response)
+
+    def _on_response(self, response):
+        if not self.regex.search(response.url) or not response.ok:
+            return
+        # Only searches made by a results page; e.g. a homepage prefetch is ignored
+        try:
+            frame_url = response.frame.url
+        except Exception:
+            return  # service worker responses have no frame
+        if '/s/' not in urlparse(frame_url).path:
+            return
+        try:
+            payload = response.json()
+        except Exception:
+            # Not JSON, or the body is gone because the page navigated away
+            return
+        listings = parse_search_payload(payload, response.url.split('/api/', 1)[0])
+        if listings:
+            self.state['search_api_listings'] = listings
+            print(f"[Search API] {len(listings)} listings from {response.url[:80]}")
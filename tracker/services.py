@@ -1,36 +1,136 @@
-import os
-from django.conf import settings
-from tracker.models import Result
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from tracker.instrument import count_db_write, current_step
+from tracker.models import Result, TestCaseName
+from tracker.screenshots import capture
 
-SCREENSHOT_DIR = os.path.join(settings.BASE_DIR, 'screenshots')
+# Rows held by a ResultBuffer before it flushes on its own
+RESULT_BUFFER_SIZE = 100
 
-# In-memory state shared across steps within the same process run
+# In-memory state shared across steps within the same scenario run.
+# A plain run uses the default dict; concurrent runs get their own dict
+# through scenario_state() so they never see each other's values.
 _state = {}
+_current_state = ContextVar('tracker_state', default=_state)
 
 
 def set_state(key: str, value: str):
     """Save state in memory for use across steps in same run."""
-    _state[key] = value
+    _current_state.get()[key] = value
 
 
 def get_state(key: str) -> str:
     """Get state saved during this run."""
-    return _state.get(key, '')
+    return _current_state.get().get(key, '')
 
 
-def take_screenshot(page, name: str) -> str:
-    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-    filename = f"{name}.png"
-    filepath = os.path.join(SCREENSHOT_DIR, filename)
-    page.screenshot(path=filepath, full_page=True)
-    return filename
+def current_state() -> dict:
+    """The state dict of the running scenario, e.g. for event listeners."""
+    return _current_state.get()
 
 
-def save_result(test_case: str, url: str, passed: bool, comment: str = '', screenshot: str = '') -> Result:
-    return Result.objects.create(
+@contextmanager
+def scenario_state(**initial):
+    """Give the current thread/task a fresh state dict for one scenario."""
+    token = _current_state.set(dict(initial))
+    try:
+        yield _current_state.get()
+    finally:
+        _current_state.reset(token)
+
+
+def take_screenshot(page, name: str, **kwargs) -> str:
+    """Capture a screenshot; returns the stored path for Result.screenshot.
+
+    See tracker.screenshots.capture for format/quality/clip options.
+    """
+    return capture(page, name, **kwargs)
+
+
+# Test case names already in TestCaseName, so repeated names cost no query
+_known_test_cases = set()
+
+
+def register_test_cases(names):
+    """Add any new test case names to the precomputed admin filter list."""
+    new = set(names) - _known_test_cases
+    if new:
+        TestCaseName.objects.bulk_create([TestCaseName(name=name) for name in new], ignore_conflicts=True)
+        _known_test_cases.update(new)
+
+
+class ResultBuffer:
+    """Collects Result rows and writes them with one bulk_create per flush."""
+
+    def __init__(self, max_size: int = RESULT_BUFFER_SIZE):
+        self.max_size = max_size
+        self.rows = []
+        self.written = 0
+
+    def add(self, result: Result):
+        self.rows.append(result)
+        if len(self.rows) >= self.max_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending row in a single transaction."""
+        if not self.rows:
+            return 0
+        rows, self.rows = self.rows, []
+        with transaction.atomic():
+            Result.objects.bulk_create(rows)
+            register_test_cases(row.test_case for row in rows)
+        count_db_write(len(rows))
+        self.written += len(rows)
+        return len(rows)
+
+
+_current_buffer = ContextVar('tracker_result_buffer', default=None)
+
+
+@contextmanager
+def buffered_results(buffer: ResultBuffer = None):
+    """Route save_result() into a buffer for the duration of a run.
+
+    The buffer is flushed on exit, including when the run raises.
+    """
+    buffer = buffer or ResultBuffer()
+    token = _current_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current_buffer.reset(token)
+        buffer.flush()
+
+
+def flush_results() -> int:
+    """Flush the active buffer, e.g. at a step boundary."""
+    buffer = _current_buffer.get()
+    return buffer.flush() if buffer else 0
+
+
+def save_result(test_case: str, url: str, passed: bool, comment: str = '', screenshot: str = '',
+                status: str = '') -> Result:
+    run_id = get_state('run_id')
+    recorder = current_step()
+    result = Result(
+        run_id=int(run_id) if run_id else None,
         test_case=test_case,
+        # Rows outside the step pipeline (e.g. "Network Profile") have no step
+        step=get_state('step') if test_case.startswith('Step ') else '',
+        status=status or ('pass' if passed else 'fail'),
+        duration_ms=recorder.lap() if recorder else 0,
         url=url,
         passed=passed,
         comment=comment,
         screenshot=screenshot,
-    )
\ No newline at end of file
+    )
+    buffer = _current_buffer.get()
+    if buffer is None:
+        result.save()
+        register_test_cases([test_case])
+        count_db_write()
+    else:
+        buffer.add(result)
+    return result
@@ -0,0 +1,71 @@
+# fast_search.py — replaces step03 and step04 when --fast-search is set
+
+import calendar
+import random
+from datetime import date, timedelta
+from urllib.parse import quote, urlencode, urljoin
+from tracker.services import save_result, get_state, set_state
+from tracker.steps.step01 import AIRBNB_URL
+
+GUEST_KEYS = ['adults', 'children', 'infants', 'pets']
+
+
+def _pick_dates(today: date) -> tuple:
+    """Check-in 3-8 months ahead in the first half of the month, 1-10 nights, like step03."""
+    month_index = today.month - 1 + random.randint(3, 8)
+    year, month = today.year + month_index // 12, month_index % 12 + 1
+    days_in_month = calendar.monthrange(year, month)[1]
+    checkin = date(year, month, random.randint(1, days_in_month // 2))
+    return checkin, checkin + timedelta(days=random.randint(1, 10))
+
+
+def _pick_guests() -> dict:
+    """2-5 guests, at least one adult, the rest spread at random, like step04."""
+    counts = {key: 0 for key in GUEST_KEYS}
+    counts['adults'] = 1
+    for _ in range(random.randint(2, 5) - 1):
+        counts[random.choice(GUEST_KEYS)] += 1
+    return counts
+
+
+def _label(day: date) -> str:
+    """Same wording as the calendar buttons' aria-labels, e.g. 'Tuesday, March 9, 2027'."""
+    return f"{day:%A}, {day:%B} {day.day}, {day.year}"
+
+
+def search_url(base_url: str, location: str, checkin: date, checkout: date, guests: dict) -> str:
+    params = {'checkin': checkin.isoformat(), 'checkout': checkout.isoformat(), **guests}
+    # Without the trailing slash urljoin would drop the last path segment (/airbnb)
+    base_url = base_url if base_url.endswith('/') else base_url + '/'
+    return urljoin(base_url, f"s/{quote(location)}/homes?{urlencode(params)}")
+
+
+def run(page):
+    """Fast path: pick dates and guests in Python and open the results URL directly."""
+
+    country = get_state('country')
+    checkin, checkout = _pick_dates(date.today())
+    guests = _pick_guests()
+    url = search_url(get_state('airbnb_url') or AIRBNB_URL, country, checkin, checkout, guests)
+
+    # The same state step03/step04 leave behind, so step05 validates it unchanged
+    set_state('checkin', _label(checkin))
+    set_state('checkout', _label(checkout))
+    set_state('month_label', f"{checkin:%B} {checkin.year}")
+    for key in GUEST_KEYS:
+        set_state(f'guest_{key}', str(guests[key]))
+    set_state('guest_total', str(sum(guests.values())))
+
+    print(f"[Fast search] {country} | {checkin} → {checkout} | "
+          + ' '.join(f'{k}={v}' for k, v in guests.items()))
+    # Search API listings seen so far belong to another page (tracker.search_api)
+    set_state('search_api_listings', [])
+    page.goto(url, wait_until='domcontentloaded')
+
+    save_result(
+        'Step 03 - Direct Search URL',
+        page.url, True,
+        f'Country: {country} | Check-in: {checkin} | Check-out: {checkout} | '
+        f"Guests: {', '.join(f'{k}={v}' for k, v in guests.items())}",
+    )
+    print(f"[Fast search] Done — {url[:120]}")
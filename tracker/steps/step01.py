@@ -1,9 +1,16 @@
 import os
 import random
-from tracker.services import save_result, set_state
+import time
+from tracker.countries import order_candidates, record_attempt
+from tracker.services import save_result, get_state, set_state
+from tracker.suggestions import fresh_entry, record_hit, record_refresh
+from tracker.waits import pause, settle
 
 AIRBNB_URL = os.getenv('AIRBNB_URL', 'https://www.airbnb.com/')
 
+QUERY_FIELD_SELECTOR = '[data-testid="structured-search-input-field-query"]'
+SUGGESTION_SELECTOR = 'div[id^="bigsearch-query-location-suggestion-"]'
+
 TOP_20_COUNTRIES = [
     'United States', 'China', 'India', 'Brazil', 'Russia',
     'Indonesia', 'Pakistan', 'Nigeria', 'Bangladesh', 'Ethiopia',
@@ -12,17 +19,52 @@ TOP_20_COUNTRIES = [
 ]
 
 
+def shard_countries(shards: int) -> list:
+    """Split TOP_20_COUNTRIES into `shards` disjoint, non-empty lists."""
+    shards = max(1, min(shards, len(TOP_20_COUNTRIES)))
+    return [TOP_20_COUNTRIES[i::shards] for i in range(shards)]
+
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.monotonic() - started) * 1000)
+
+
+def _order_candidates(countries: list) -> tuple:
+    """Countries in the scenario's selection order, and a label for the log."""
+    if get_state('country_selection') == 'random':
+        countries = list(countries)
+        random.shuffle(countries)
+        return countries, 'random'
+    # Countries that found a location quickly in past runs go first
+    countries, mode = order_candidates(countries)
+    return countries, f'adaptive ({mode})'
+
+
+def _candidates() -> tuple:
+    """Every country in the order step 01 tries them, and the selection label.
+
+    A sharded scenario tries its own slice first; the other countries stay
+    behind it so one missing autosuggest cannot fail the whole run.
+    """
+    own = [c for c in get_state('candidate_countries').split('|||') if c]
+    countries, selection = _order_candidates(own or TOP_20_COUNTRIES)
+    if own:
+        countries += _order_candidates([c for c in TOP_20_COUNTRIES if c not in own])[0]
+    return countries, selection
+
+
 def close_popups(page):
     page.evaluate("""() => {
         document.querySelectorAll('[data-testid="modal-container"]').forEach(el => el.remove());
         document.querySelectorAll('div[role="dialog"]').forEach(el => el.remove());
     }""")
-    page.wait_for_timeout(500)
+    settle(page, 500, quiet_ms=150)
 
 
 def run(page):
-    page.goto(AIRBNB_URL, wait_until='domcontentloaded')
-    page.wait_for_timeout(5000)
+    # A scenario may point at another target, e.g. the local stand-in site
+    page.goto(get_state('airbnb_url') or AIRBNB_URL, wait_until='domcontentloaded')
+    settle(page, 5000, selector=QUERY_FIELD_SELECTOR, quiet_ms=500)
     page.evaluate("() => { localStorage.clear(); sessionStorage.clear(); }")
     page.context.clear_cookies()
     close_popups(page)
@@ -31,32 +73,52 @@ def run(page):
     save_result('Step 01 - Homepage Load', page.url, True, 'Homepage loaded', '')
     print("[Step 01] Homepage loaded")
 
-    countries = TOP_20_COUNTRIES.copy()
-    random.shuffle(countries)
+    countries, selection = _candidates()
+    print(f"[Step 01] Candidate order ({selection}): {', '.join(countries[:5])}, ...")
     country = None
     chosen_text = None
     suggestion_data = []
+    search_started = time.monotonic()
+    attempts = 0
 
     for candidate in countries:
         print(f"  Trying: {candidate}")
+        attempts += 1
+        attempt_started = time.monotonic()
 
         query_field = page.get_by_test_id("structured-search-input-field-query")
         query_field.wait_for(state='visible', timeout=10000)
         close_popups(page)
         query_field.click()
-        page.wait_for_timeout(500)
+        pause(0.5)
         query_field.fill("")
-        page.wait_for_timeout(300)
-
-        for char in candidate:
-            page.keyboard.type(char, delay=150)
-        page.wait_for_timeout(3000)
-
-        suggestion_locator = page.locator('div[id^="bigsearch-query-location-suggestion-"]')
+        pause(0.3)
+
+        # A fresh cache entry means the list is known: type at once and only
+        # wait for the live list to appear so it can still be checked
+        use_cache = get_state('suggestion_cache') != 'off'
+        cached = fresh_entry(candidate) if use_cache else None
+        started = time.monotonic()
+        if cached:
+            query_field.fill(candidate)
+            settle(page, 3000, selector=SUGGESTION_SELECTOR, quiet_ms=150)
+            # settle() also reports a DOM that never went quiet; only a
+            # missing list means the pasted text was ignored
+            if not page.locator(SUGGESTION_SELECTOR).first.is_visible():
+                # The list did not react to the pasted text; type it after all
+                cached = None
+                query_field.fill("")
+        if not cached:
+            for char in candidate:
+                page.keyboard.type(char, delay=150)
+            settle(page, 3000, selector=SUGGESTION_SELECTOR, quiet_ms=300)
+
+        suggestion_locator = page.locator(SUGGESTION_SELECTOR)
         try:
             suggestion_locator.first.wait_for(state='visible', timeout=5000)
         except Exception:
             print(f"  No suggestions for {candidate}")
+            record_attempt(candidate, 'no_suggestions', _elapsed_ms(attempt_started))
             continue
 
         suggestions = page.evaluate(
@@ -74,10 +136,23 @@ def run(page):
         )
 
         if not suggestions:
+            record_attempt(candidate, 'no_suggestions', _elapsed_ms(attempt_started))
             continue
 
         print(f"  Found {len(suggestions)} suggestions")
 
+        lookup_ms = _elapsed_ms(started)
+        if use_cache:
+            if cached:
+                matches = record_hit(cached, suggestions)
+                cache_note = f"hit | live list {'matches' if matches else 'changed'}"
+            else:
+                record_refresh(candidate, suggestions, lookup_ms)
+                cache_note = 'miss | refreshed'
+            save_result('Step 01 - Suggestion Cache', page.url, True,
+                        f'Query: {candidate} | Cache: {cache_note} | Suggestions in: {lookup_ms} ms', '')
+            print(f"  Suggestion cache {cache_note} ({lookup_ms} ms)")
+
         # Find exact match
         preferred_index = None
         for s in suggestions:
@@ -99,14 +174,14 @@ def run(page):
             option = page.get_by_test_id(f"option-{preferred_index}")
             option.wait_for(state='visible', timeout=5000)
             option.click()
-            page.wait_for_timeout(3000)
+            settle(page, 3000, selector=SUGGESTION_SELECTOR, state='hidden', quiet_ms=300)
         except Exception as e:
             print(f"  option-{preferred_index} failed: {e}")
             for _ in range(preferred_index + 1):
                 page.keyboard.press('ArrowDown')
-                page.wait_for_timeout(200)
+                pause(0.2)
             page.keyboard.press('Enter')
-            page.wait_for_timeout(3000)
+            settle(page, 3000, selector=SUGGESTION_SELECTOR, state='hidden', quiet_ms=300)
 
         try:
             retained = query_field.input_value()
@@ -114,6 +189,7 @@ def run(page):
             retained = ''
         print(f"  Location retained: '{retained}'")
 
+        record_attempt(candidate, 'selected' if retained else 'not_retained', _elapsed_ms(attempt_started))
         if retained:
             suggestion_data = suggestions
             chosen_text = suggestions[preferred_index]['text']
@@ -124,7 +200,10 @@ def run(page):
 
     assert country, "Could not select any country"
 
-    save_result('Step 01 - Search Input', page.url, True, f'Country: {country}', '')
+    time_to_location = _elapsed_ms(search_started)
+    save_result('Step 01 - Search Input', page.url, True,
+                f'Country: {country} | Attempts: {attempts} | Time to location: {time_to_location} ms | '
+                f'Selection: {selection}', '')
     print(f"[Step 01] Done — typed: {country}")
 
     for item in suggestion_data:
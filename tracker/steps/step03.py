@@ -1,7 +1,7 @@
 #step03.py
 import random
-import time
 from tracker.services import save_result, get_state, set_state
+from tracker.waits import settle
 
 WHEN_FIELD_SELECTORS = [
     '[data-testid="structured-search-input-field-split-dates-0"]',
@@ -45,9 +45,9 @@ def _open_date_picker(page) -> None:
     # First expand the search bar by clicking query field
     try:
         page.get_by_test_id('structured-search-input-field-query').click()
-        time.sleep(1.5)
+        settle(page, 1500, quiet_ms=250)
         page.keyboard.press('Escape')
-        time.sleep(0.5)
+        settle(page, 500, quiet_ms=150)
     except Exception:
         pass
 
@@ -57,7 +57,7 @@ def _open_date_picker(page) -> None:
             if el and el.is_visible():
                 el.click()
                 print(f"  Clicked date field via: {sel}")
-                time.sleep(1.5)
+                settle(page, 1500, quiet_ms=250)
                 return
         except Exception:
             continue
@@ -74,7 +74,7 @@ def _open_date_picker(page) -> None:
             );
             if (el) el.click();
         }""")
-        time.sleep(1.5)
+        settle(page, 1500, quiet_ms=250)
     except Exception:
         pass
 
@@ -85,7 +85,7 @@ def _ensure_picker_open(page, attempts=4) -> bool:
         if _picker_is_open(page):
             return True
         _open_date_picker(page)
-        time.sleep(1.0)
+        settle(page, 1000, quiet_ms=250)
         if _picker_is_open(page):
             return True
     return False
@@ -193,7 +193,7 @@ def _read_month_label(page) -> str:
 def run(page):
     """Step 03: Open date picker, navigate months, select check-in and check-out."""
 
-    time.sleep(2)
+    settle(page, 2000, quiet_ms=300)
     country = get_state('country')
     print(f"[Step 03] Country: '{country}'")
 
@@ -219,7 +219,7 @@ def run(page):
         if _click_next_month(page):
             next_clicks_done += 1
             print(f"  Month {next_clicks_done}/{required_next_clicks} navigated")
-            time.sleep(0.8)
+            settle(page, 800, quiet_ms=200)
         else:
             # Reopen picker if it closed
             _ensure_picker_open(page, attempts=2)
@@ -238,7 +238,7 @@ def run(page):
     checkin_label = checkin_candidate.get('label') or checkin_candidate.get('text', '')
     page.mouse.click(float(checkin_candidate['x']), float(checkin_candidate['y']))
     print(f"[Step 03] Check-in clicked: {checkin_label}")
-    time.sleep(1.0)
+    settle(page, 1000, quiet_ms=250)
 
     # Ensure picker still open for checkout
     _ensure_picker_open(page, attempts=2)
@@ -253,7 +253,7 @@ def run(page):
     checkout_label = checkout_candidate.get('label') or checkout_candidate.get('text', '')
     page.mouse.click(float(checkout_candidate['x']), float(checkout_candidate['y']))
     print(f"[Step 03] Check-out clicked: {checkout_label}")
-    time.sleep(1.0)
+    settle(page, 1000, quiet_ms=250)
 
     set_state('checkin', checkin_label)
     set_state('checkout', checkout_label)
@@ -1,8 +1,8 @@
 # Step04.py
 
 import random
-import time
 from tracker.services import save_result, get_state, set_state
+from tracker.waits import settle
 
 GUEST_FIELD_SELECTORS = [
     '[data-testid="structured-search-input-field-guests-button"]',
@@ -64,7 +64,7 @@ def _open_guest_field(page) -> bool:
             loc = page.locator(sel).first
             if loc.is_visible(timeout=500):
                 loc.click(timeout=1500)
-                time.sleep(0.5)
+                settle(page, 500, selector=STEPPER_INCREASE_SELECTORS['adults'])
                 if _popup_is_open(page):
                     print(f"  Guest field opened via: {sel}")
                     return True
@@ -93,7 +93,7 @@ def _open_guest_field(page) -> bool:
             return true;
         }"""))
         if clicked:
-            time.sleep(0.5)
+            settle(page, 500, selector=STEPPER_INCREASE_SELECTORS['adults'])
             if _popup_is_open(page):
                 print("  Guest field opened via JS fallback")
                 return True
@@ -215,6 +215,8 @@ def _get_guest_display(page) -> str:
 
 def _click_search(page) -> bool:
     """Click the Search button."""
+    # Search API listings seen so far belong to another page (tracker.search_api)
+    set_state('search_api_listings', [])
     for sel in SEARCH_BTN_SELECTORS:
         try:
             loc = page.locator(sel).first
@@ -257,7 +259,7 @@ def _click_search(page) -> bool:
 def run(page):
     """Step 04: Open guest picker, select random guests, click search."""
 
-    time.sleep(1)
+    settle(page, 1000, quiet_ms=250)
     country = get_state('country')
     checkin = get_state('checkin')
     checkout = get_state('checkout')
@@ -275,7 +277,7 @@ def run(page):
         print(f"  Waiting for guest popup... attempt {attempt + 1}")
         if attempt < 7:
             _open_guest_field(page)
-        time.sleep(1.0)
+        settle(page, 1000, selector=STEPPER_INCREASE_SELECTORS['adults'])
 
     if not popup_visible:
         save_result('Step 04 - Guest Picker', page.url, False,
@@ -303,7 +305,7 @@ def run(page):
         if _click_stepper_increase(page, 'adults'):
             added_counts['adults'] += 1
             remaining -= 1
-            time.sleep(0.35)
+            settle(page, 350, quiet_ms=100)
 
     # Distribute remaining randomly
     pool = list(available_keys)
@@ -314,7 +316,7 @@ def run(page):
         if _click_stepper_increase(page, key):
             added_counts[key] += 1
             remaining -= 1
-            time.sleep(0.3)
+            settle(page, 300, quiet_ms=100)
         else:
             pool = [k for k in pool if k != key]
 
@@ -341,7 +343,7 @@ def run(page):
     # Close popup
     try:
         page.keyboard.press('Escape')
-        time.sleep(0.5)
+        settle(page, 500, selector=STEPPER_INCREASE_SELECTORS['adults'], state='hidden')
     except Exception:
         pass
 
@@ -351,7 +353,7 @@ def run(page):
 
     # Click Search
     search_clicked = _click_search(page)
-    time.sleep(5)
+    settle(page, 5000, url_contains='/s/', load_state='domcontentloaded', quiet_ms=500)
 
     comment = (
         f"Country: {country} | Check-in: {checkin} | Check-out: {checkout} | "
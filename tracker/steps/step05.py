@@ -1,7 +1,8 @@
 import re
 import time
-from urllib.parse import parse_qs, urlparse
-from tracker.services import save_result, get_state, set_state
+from urllib.parse import parse_qs, urljoin, urlparse
+from tracker.services import flush_results, save_result, get_state, set_state
+from tracker.waits import settle, wait_until_ready
 
 
 LISTING_CARD_SELECTORS = [
@@ -10,14 +11,79 @@ LISTING_CARD_SELECTORS = [
     'article',
 ]
 
+LISTING_TITLE_SELECTORS = [
+    '[data-testid="listing-card-title"]',
+    'div[role="heading"]',
+    'span[id*="title"]',
+]
+
+LISTING_PRICE_SELECTORS = [
+    'span[data-testid*="price"]',
+    'span._tyxjp1',
+    '._1y74zjx',
+]
+
+NEXT_PAGE_SELECTORS = [
+    'nav[aria-label*="pagination" i] a[aria-label="Next"]',
+    'a[aria-label="Next"]',
+]
+
+# href of the first enabled "Next" pagination link, or null on the last page
+NEXT_PAGE_JS = """(selectors) => {
+    for (const sel of selectors) {
+        const a = document.querySelector(sel);
+        if (a && a.getAttribute('href') && a.getAttribute('aria-disabled') !== 'true') {
+            return a.getAttribute('href');
+        }
+    }
+    return null;
+}"""
+
+ROOM_ID_PATTERN = re.compile(r'/rooms/(?:plus/)?(\d+)')
+
+# Collects every card field in one evaluate. For each card: the first
+# title/price selector with non-empty text wins, plus the first img src
+# and the first link href. Keys are only set when found.
+SCRAPE_LISTINGS_JS = """({cardSelectors, titleSelectors, priceSelectors, limit}) => {
+    let cards = [];
+    let selector = '';
+    for (const sel of cardSelectors) {
+        const found = document.querySelectorAll(sel);
+        if (found.length) {
+            cards = Array.from(found);
+            selector = sel;
+            break;
+        }
+    }
+
+    const firstText = (card, selectors) => {
+        for (const sel of selectors) {
+            const el = card.querySelector(sel);
+            const text = el ? (el.innerText || '').trim() : '';
+            if (text) return text;
+        }
+        return null;
+    };
+
+    const out = cards.slice(0, limit || cards.length).map(card => {
+        const item = {};
+        const title = firstText(card, titleSelectors);
+        if (title) item.title = title;
+        const price = firstText(card, priceSelectors);
+        if (price) item.price = price;
+        const img = card.querySelector('img');
+        if (img) item.image_url = img.getAttribute('src') || '';
+        const a = card.querySelector('a');
+        if (a) item.href = a.getAttribute('href') || '';
+        return item;
+    });
+    return {selector: selector, cards: out};
+}"""
+
 
 def _wait_for_results_page(page, timeout=15) -> bool:
-    """Poll until URL contains /s/ indicating search results page."""
-    for _ in range(timeout):
-        if '/s/' in page.url:
-            return True
-        time.sleep(1)
-    return False
+    """Wait until URL contains /s/ indicating search results page."""
+    return wait_until_ready(page, url_contains='/s/', timeout_ms=timeout * 1000)
 
 
 def _extract_first_int(text: str):
@@ -54,84 +120,133 @@ def _extract_day_from_iso(date_text: str) -> str:
     return match.group(1).lstrip('0') or '0'
 
 
-def _scrape_listings(page) -> list:
-    """Scrape listing cards from results page."""
-    listing_elements = []
-    used_selector = ''
+def _scrape_listings(page, limit: int = 20) -> list:
+    """Listings of the current results page; limit=None returns all of them.
 
-    for sel in LISTING_CARD_SELECTORS:
-        elements = page.query_selector_all(sel)
-        if elements:
-            listing_elements = elements
-            used_selector = sel
-            print(f"  Listing cards found via: {sel}")
-            break
+    The listings tracker.search_api captured from the page's search API
+    response are used when present, including ones not rendered yet;
+    otherwise the cards are scraped in a single browser round trip.
+    """
+    api_listings = get_state('search_api_listings')
+    if api_listings:
+        print(f"  Listings read from the search API response ({len(api_listings)})")
+        return list(api_listings[:limit] if limit else api_listings)
 
-    listings = []
-    for el in listing_elements[:20]:
-        listing = {}
-
-        # Title
-        for title_sel in [
-            '[data-testid="listing-card-title"]',
-            'div[role="heading"]',
-            'span[id*="title"]',
-        ]:
-            try:
-                t = el.query_selector(title_sel)
-                if t:
-                    text = t.inner_text().strip()
-                    if text:
-                        listing['title'] = text
-                        break
-            except Exception:
-                pass
-
-        # Price
-        for price_sel in [
-            'span[data-testid*="price"]',
-            'span._tyxjp1',
-            '._1y74zjx',
-        ]:
-            try:
-                p = el.query_selector(price_sel)
-                if p:
-                    text = p.inner_text().strip()
-                    if text:
-                        listing['price'] = text
-                        break
-            except Exception:
-                pass
-
-        # Image URL
-        try:
-            img = el.query_selector('img')
-            if img:
-                listing['image_url'] = img.get_attribute('src') or ''
-        except Exception:
-            pass
+    result = page.evaluate(SCRAPE_LISTINGS_JS, {
+        'cardSelectors': LISTING_CARD_SELECTORS,
+        'titleSelectors': LISTING_TITLE_SELECTORS,
+        'priceSelectors': LISTING_PRICE_SELECTORS,
+        'limit': limit,
+    })
 
-        # Detail URL
-        try:
-            a = el.query_selector('a')
-            if a:
-                href = a.get_attribute('href') or ''
-                listing['detail_url'] = (
-                    f'https://www.airbnb.com{href}' if href.startswith('/') else href
-                )
-        except Exception:
-            pass
+    if result['selector']:
+        print(f"  Listing cards found via: {result['selector']}")
 
+    listings = []
+    for card in result['cards']:
+        listing = {k: v for k, v in card.items() if k != 'href'}
+        if 'href' in card:
+            # Resolve against the page so a local stand-in site works too
+            href = card['href']
+            listing['detail_url'] = urljoin(page.url, href) if href.startswith('/') else href
         if listing:
             listings.append(listing)
 
     return listings
 
 
+def _room_key(listing: dict) -> str:
+    """Room id from the API data or the detail URL; falls back to the URL, then title and price."""
+    if listing.get('room_id'):
+        return listing['room_id']
+    url = listing.get('detail_url', '')
+    match = ROOM_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    return url or f"{listing.get('title', '')}|{listing.get('price', '')}"
+
+
+def _save_listings(listings: list, country: str, page_url: str, seen: set, limit: int = None) -> tuple:
+    """Save listings not seen before (by room id); returns (saved, duplicates)."""
+    saved = []
+    duplicates = 0
+    for listing in listings:
+        if limit is not None and len(saved) >= limit:
+            break
+        key = _room_key(listing)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        saved.append(listing)
+
+        title = listing.get('title', 'N/A')
+        price = listing.get('price', 'N/A')
+        image_url = listing.get('image_url', '')
+        detail_url = listing.get('detail_url', page_url)
+        comment = f'Country: {country} | Title: {title} | Price: {price} | Image: {image_url}'
+        # Only the search API carries these
+        if listing.get('rating'):
+            comment += f" | Rating: {listing['rating']}"
+        if listing.get('lat') is not None and listing.get('lng') is not None:
+            comment += f" | Coordinates: {listing['lat']},{listing['lng']}"
+        save_result('Step 05 - Listing Item', detail_url, True, comment, '')
+        print(f"  Listing: {title} | {price}")
+    return saved, duplicates
+
+
+def _crawl(page, country: str, seen: set, detail_urls: list, max_pages: int, max_listings: int) -> int:
+    """Follow the results pagination after page 1 until a limit or the last page.
+
+    Each page is written to the DB before the next one is loaded, so only
+    room ids and detail URLs are kept in memory. A page that fails to load
+    ends the crawl. Returns the pages visited.
+    """
+    card_selector = ', '.join(LISTING_CARD_SELECTORS)
+    page_number = 1
+    while (not max_pages or page_number < max_pages) and (not max_listings or len(seen) < max_listings):
+        next_href = page.evaluate(NEXT_PAGE_JS, NEXT_PAGE_SELECTORS)
+        if not next_href:
+            print(f"[Step 05] No next page after page {page_number}")
+            break
+        page_number += 1
+
+        started = time.monotonic()
+        next_url = urljoin(page.url, next_href)
+        # Listings of the previous page must not be mistaken for this one's
+        set_state('search_api_listings', [])
+        try:
+            page.goto(next_url, wait_until='domcontentloaded')
+            wait_until_ready(page, selector=card_selector, quiet_ms=300, timeout_ms=15000)
+            load_ms = (time.monotonic() - started) * 1000
+            listings = _scrape_listings(page, limit=None)
+        except Exception as e:
+            # The pages so far are stored; end the crawl instead of failing the run
+            save_result('Step 05 - Crawl Page', next_url, False,
+                        f'Page: {page_number} | Navigation failed: {type(e).__name__}: {e}', '')
+            flush_results()
+            print(f"[Step 05] Page {page_number} failed, stopping the crawl: {e}")
+            return page_number - 1
+        budget = max_listings - len(seen) if max_listings else None
+        saved, duplicates = _save_listings(listings, country, page.url, seen, budget)
+        detail_urls.extend(l['detail_url'] for l in saved if l.get('detail_url'))
+        flush_results()
+        total_ms = (time.monotonic() - started) * 1000
+
+        comment = (
+            f"Page: {page_number} | Cards: {len(listings)} | New: {len(saved)} | "
+            f"Duplicates: {duplicates} | Total listings: {len(seen)} | "
+            f"Load: {load_ms:.0f} ms | Scrape+save: {total_ms - load_ms:.0f} ms"
+        )
+        save_result('Step 05 - Crawl Page', page.url, bool(listings), comment, '')
+        print(f"[Step 05] {comment}")
+    return page_number
+
+
 def run(page):
     """Step 05: Verify search results page, validate URL params, scrape listings."""
 
-    time.sleep(3)
+    settle(page, 3000, url_contains='/s/', selector=', '.join(LISTING_CARD_SELECTORS), quiet_ms=500)
 
     # Restore state
     country = get_state('country')
@@ -213,31 +328,31 @@ def run(page):
         print(f"  location='{country}' checkin='{checkin}' checkout='{checkout}' "
               f"guests={expected_guest_total}")
 
+    # Crawl mode scrapes every card and follows the pagination
+    crawl = bool(get_state('crawl_pages'))
+    max_pages = int(get_state('crawl_pages') or 0)
+    max_listings = int(get_state('crawl_listings') or 0)
+
     # Scrape listings
-    listings = _scrape_listings(page)
+    listings = _scrape_listings(page, limit=None if crawl else 20)
     print(f"[Step 05] Scraped {len(listings)} listings")
 
-    # Save each listing as individual Result record
-    for listing in listings:
-        title = listing.get('title', 'N/A')
-        price = listing.get('price', 'N/A')
-        image_url = listing.get('image_url', '')
-        detail_url = listing.get('detail_url', current_url)
-        save_result(
-            'Step 05 - Listing Item',
-            detail_url,
-            True,
-            f'Country: {country} | Title: {title} | Price: {price} | Image: {image_url}',
-            ''
-        )
-        print(f"  Listing: {title} | {price}")
+    # Save each listing as individual Result record, once per room id
+    seen = set()
+    saved, _ = _save_listings(listings, country, current_url, seen, max_listings or None)
+    detail_urls = [l.get('detail_url', '') for l in saved if l.get('detail_url')]
+
+    pages_crawled = 1
+    if crawl and max_pages != 1:
+        # Page 1 goes to the DB before page 2 is requested
+        flush_results()
+        pages_crawled = _crawl(page, country, seen, detail_urls, max_pages, max_listings)
 
     # Save state for step06
-    set_state('listings_count', str(len(listings)))
+    set_state('listings_count', str(len(seen)))
     set_state('results_url', current_url)
 
     # Store listing detail URLs for step06 to pick from
-    detail_urls = [l.get('detail_url', '') for l in listings if l.get('detail_url')]
     set_state('listing_detail_urls', '|||'.join(detail_urls))
 
     passed = all([
@@ -256,7 +371,8 @@ def run(page):
         f"Dates match: {url_dates_match} | "
         f"URL guests: {url_guest_total} | Expected: {expected_guest_total} | "
         f"Guests match: {url_guests_match} | "
-        f"Listings scraped: {len(listings)}"
+        f"Listings scraped: {len(listings)} | "
+        f"Pages crawled: {pages_crawled} | Unique listings: {len(seen)}"
     )
 
     save_result('Step 05 - Results Page', current_url, passed, comment, '')
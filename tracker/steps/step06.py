@@ -1,20 +1,66 @@
+import json
 import random
 import time
-from tracker.services import save_result, get_state
+from collections import deque
+from urllib.parse import urljoin
+from tracker.services import flush_results, save_result, get_state
+from tracker.waits import settle, wait_until_ready
 
+# Detail pages visited at once by the fan-out mode
+DETAIL_CONCURRENCY = 4
 
-def run(page):
-    """Step 06: Click a random listing and verify its details page."""
+# Time one detail page gets to show its title in the fan-out mode
+DETAIL_TIMEOUT_MS = 15000
 
-    time.sleep(1)
+# Serialized page state the detail page ships for hydration. Reading it is
+# one round trip and, unlike the DOM, it holds the complete amenity and
+# photo lists.
+PAGE_STATE_JS = """() => Array.from(
+    document.querySelectorAll('script[id^="data-deferred-state"], script#data-injector-instances')
+).map(s => s.textContent)"""
 
-    country = get_state('country')
-    checkin = get_state('checkin')
-    checkout = get_state('checkout')
-    print(f"[Step 06] State — country: {country} | checkin: {checkin} | checkout: {checkout}")
+# Section types of the page state, in order of preference per field
+TITLE_SECTIONS = ['TITLE_DEFAULT', 'PDP_TITLE']
+SUBTITLE_SECTIONS = ['OVERVIEW_DEFAULT_V2', 'OVERVIEW_DEFAULT']
+HOST_SECTIONS = ['HOST_OVERVIEW_DEFAULT', 'MEET_YOUR_HOST']
+REVIEW_SECTIONS = ['REVIEWS_DEFAULT', 'STAYS_PDP_REVIEWS']
+AMENITY_SECTIONS = ['AMENITIES_DEFAULT']
+PRICE_SECTIONS = ['BOOK_IT_SIDEBAR', 'BOOK_IT_FLOATING_FOOTER']
+PHOTO_SECTIONS = ['PHOTO_TOUR_SCROLLABLE', 'HERO_DEFAULT']
+
+# Fields the page state can lack because they load separately; the DOM fills them
+DOM_FILL_FIELDS = ['rating', 'price']
+
+# DOM fallback: every field of a detail page in one evaluate; missing fields come back empty
+SCRAPE_DETAILS_JS = """() => {
+    const text = el => el ? (el.innerText || '').trim() : '';
+    const headings = Array.from(document.querySelectorAll('h2, h3'));
+    const hostHeading = headings.find(e => (e.innerText || '').toLowerCase().includes('hosted by'));
+    const amenities = Array.from(document.querySelectorAll(
+        '[data-testid="amenity-row"] span, [data-testid*="amenities"] li, div[class*="amenity"]'
+    )).map(el => el.innerText.trim()).filter((name, i, all) => name && all.indexOf(name) === i);
+    const images = [];
+    for (const img of document.querySelectorAll('img[data-original-uri], img[src*="muscache"]')) {
+        const src = img.getAttribute('src') || '';
+        if (src && !images.includes(src)) images.push(src);
+    }
+    return {
+        title: text(document.querySelector('h1')) || 'N/A',
+        subtitle: text(document.querySelector('h2')) || 'N/A',
+        rating: text(document.querySelector(
+            '[aria-label*="rating"], [data-testid*="rating"], span[class*="rating"]'
+        )),
+        host: text(hostHeading),
+        amenities: amenities,
+        price: text(document.querySelector('[data-testid*="price"], span[class*="price"], ._tyxjp1')),
+        images: images,
+    };
+}"""
 
-    # Collect all listing card hrefs first
-    detail_urls = page.evaluate("""() => {
+
+def _collect_detail_urls(page) -> list:
+    """Listing hrefs from the results page, resolved to absolute URLs."""
+    return page.evaluate("""() => {
         const cards = Array.from(document.querySelectorAll(
             '[data-testid="card-container"], [data-testid="listing-card-wrapper"], article'
         ));
@@ -24,7 +70,7 @@ def run(page):
             if (a) {
                 const href = a.getAttribute('href');
                 if (href) {
-                    const url = href.startsWith('http') ? href : 'https://www.airbnb.com' + href;
+                    const url = new URL(href, location.href).href;
                     if (!urls.includes(url)) urls.push(url);
                 }
             }
@@ -32,6 +78,227 @@ def run(page):
         return urls;
     }""")
 
+
+def _iter_sections(node):
+    """(sectionComponentType, section) pairs anywhere in the page state, in document order."""
+    if isinstance(node, dict):
+        if isinstance(node.get('sectionComponentType'), str) and isinstance(node.get('section'), dict):
+            yield node['sectionComponentType'], node['section']
+        for value in node.values():
+            yield from _iter_sections(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_sections(value)
+
+
+def _details_from_state(scripts: list, base_url: str):
+    """Parse listing details from the page state scripts; None when there is no usable state."""
+    sections = {}
+    for text in scripts or []:
+        try:
+            state = json.loads(text)
+        except (TypeError, ValueError):
+            continue
+        for kind, section in _iter_sections(state):
+            sections.setdefault(kind, section)
+
+    def first(kinds):
+        return next((sections[k] for k in kinds if k in sections), {})
+
+    title = first(TITLE_SECTIONS).get('title')
+    if not title:
+        return None
+
+    host_section = first(HOST_SECTIONS)
+    host = host_section.get('title') or ''
+    if not host and (host_section.get('cardData') or {}).get('name'):
+        host = f"Hosted by {host_section['cardData']['name']}"
+
+    reviews = first(REVIEW_SECTIONS)
+    rating = ''
+    if reviews.get('overallRating'):
+        rating = f"{reviews['overallRating']} · {reviews.get('overallCount') or 0} reviews"
+
+    amenities = []
+    amenity_section = first(AMENITY_SECTIONS)
+    for group in amenity_section.get('seeAllAmenitiesGroups') or amenity_section.get('previewAmenitiesGroups') or []:
+        for amenity in group.get('amenities') or []:
+            # Unavailable amenities are listed too, struck through on the page
+            if amenity.get('available', True) and amenity.get('title') and amenity['title'] not in amenities:
+                amenities.append(amenity['title'])
+
+    line = (first(PRICE_SECTIONS).get('structuredDisplayPrice') or {}).get('primaryLine') or {}
+    price = line.get('price') or line.get('discountedPrice') or ''
+    if price and line.get('qualifier'):
+        price = f"{price} {line['qualifier']}"
+
+    images = []
+    photo_section = first(PHOTO_SECTIONS)
+    for item in photo_section.get('mediaItems') or photo_section.get('previewImages') or []:
+        src = item.get('baseUrl')
+        if src:
+            src = urljoin(base_url, src)
+            if src not in images:
+                images.append(src)
+
+    return {
+        'title': title,
+        'subtitle': first(SUBTITLE_SECTIONS).get('title') or 'N/A',
+        'rating': rating,
+        'host': host,
+        'amenities': amenities,
+        'price': price,
+        'images': images,
+        'source': 'page state',
+    }
+
+
+def _extract_details(page) -> dict:
+    """Listing details from the embedded page state, falling back to the DOM.
+
+    DOM_FILL_FIELDS the state lacks are filled from one DOM scrape, which
+    only runs when one of them is missing. Other empty fields are taken as
+    the listing's real value.
+    """
+    details = _details_from_state(page.evaluate(PAGE_STATE_JS), page.url)
+    if details is None:
+        details = page.evaluate(SCRAPE_DETAILS_JS)
+        details['source'] = 'DOM'
+        return details
+
+    missing = [key for key in DOM_FILL_FIELDS if not details[key]]
+    if missing:
+        dom = page.evaluate(SCRAPE_DETAILS_JS)
+        filled = [key for key in missing if dom.get(key) not in (None, '', 'N/A', [])]
+        for key in filled:
+            details[key] = dom[key]
+        if filled:
+            details['source'] = f"page state + DOM ({', '.join(filled)})"
+    return details
+
+
+def _detail_urls(page) -> list:
+    """Detail URLs from the captured search API listings, else from the cards."""
+    listings = get_state('search_api_listings') or []
+    urls = [l['detail_url'] for l in listings if l.get('detail_url')]
+    return urls or _collect_detail_urls(page)
+
+
+def _save_details(url: str, details: dict):
+    """Store one listing's images, amenities and summary as Result rows."""
+    country = get_state('country')
+    checkin = get_state('checkin')
+    checkout = get_state('checkout')
+
+    for img_url in details['images']:
+        save_result('Step 06 - Listing Image', url, True, f'Image URL: {img_url}', '')
+
+    if details['amenities']:
+        save_result('Step 06 - Listing Amenities', url, True,
+                    f'Amenities: {", ".join(details["amenities"])}', '')
+
+    comment = (
+        f"Country: {country} | Checkin: {checkin} | Checkout: {checkout} | "
+        f"Title: {details['title']} | Subtitle: {details['subtitle']} | Host: {details['host']} | "
+        f"Rating: {details['rating']} | Price: {details['price']} | "
+        f"Amenities: {len(details['amenities'])} | Images: {len(details['images'])} | "
+        f"Source: {details['source']}"
+    )
+    save_result('Step 06 - Listing Details', url, True, comment, '')
+
+
+def _fan_out(page, urls: list, concurrency: int) -> int:
+    """Visit every detail URL with up to `concurrency` pages of the same context.
+
+    The sync API drives one page at a time, so navigations are only
+    started (wait_until='commit') and the browser loads them in parallel
+    while the oldest page is waited on and scraped. A finished page is
+    reused for the next URL. Each listing is flushed to the DB as soon as
+    it is scraped. Returns the number of listings scraped.
+    """
+    pending = deque(urls)
+    in_flight = deque()
+    pages = [page.context.new_page() for _ in range(min(concurrency, len(urls)))]
+    scraped = 0
+
+    def start(detail_page):
+        url = pending.popleft()
+        try:
+            detail_page.goto(url, wait_until='commit')
+        except Exception as e:
+            print(f"[Step 06] Could not open {url[:80]}: {e}")
+        in_flight.append((detail_page, url, time.monotonic()))
+
+    try:
+        for detail_page in pages:
+            start(detail_page)
+
+        while in_flight:
+            detail_page, url, started = in_flight.popleft()
+            # One bad page (e.g. it navigated away mid-scrape) must not stop the others
+            try:
+                if wait_until_ready(detail_page, selector='h1', timeout_ms=DETAIL_TIMEOUT_MS):
+                    details = _extract_details(detail_page)
+                    _save_details(url, details)
+                    scraped += 1
+                    print(f"[Step 06] {details['title'][:60]} | {details['price']} | "
+                          f"{len(details['images'])} images — {(time.monotonic() - started) * 1000:.0f} ms")
+                else:
+                    save_result('Step 06 - Listing Details', url, False, 'Detail page did not load', '')
+                    print(f"[Step 06] Timed out: {url[:80]}")
+            except Exception as e:
+                save_result('Step 06 - Listing Details', url, False, f'Scrape failed: {type(e).__name__}: {e}', '')
+                print(f"[Step 06] Failed: {url[:80]}: {e}")
+            flush_results()
+            if pending:
+                start(detail_page)
+    finally:
+        for detail_page in pages:
+            try:
+                detail_page.close()
+            except Exception as e:
+                # Never hide the error that got us here
+                print(f"[Step 06] Could not close a detail page: {e}")
+
+    return scraped
+
+
+def run_fan_out(page):
+    """Step 06 (fan-out mode): scrape the detail page of every listing step05 found."""
+    urls = [u for u in get_state('listing_detail_urls').split('|||') if u] or _detail_urls(page)
+    limit = int(get_state('detail_pages') or 0)
+    if limit > 0:
+        urls = urls[:limit]
+    concurrency = int(get_state('detail_concurrency') or DETAIL_CONCURRENCY)
+    assert urls, "No listing detail URLs found on results page"
+
+    print(f"[Step 06] Fanning out over {len(urls)} detail pages, {concurrency} at a time")
+    started = time.monotonic()
+    scraped = _fan_out(page, urls, max(1, concurrency))
+    elapsed = time.monotonic() - started
+
+    comment = (f"Detail pages: {len(urls)} | Scraped: {scraped} | Concurrency: {concurrency} | "
+               f"Elapsed: {elapsed:.1f}s")
+    save_result('Step 06 - Detail Fan-out', page.url, scraped == len(urls), comment, '')
+    print(f"[Step 06] Done — {comment}")
+
+
+def run(page):
+    """Step 06: Click a random listing and verify its details page."""
+
+    if get_state('detail_pages'):
+        return run_fan_out(page)
+
+    settle(page, 1000, quiet_ms=250)
+
+    country = get_state('country')
+    checkin = get_state('checkin')
+    checkout = get_state('checkout')
+    print(f"[Step 06] State — country: {country} | checkin: {checkin} | checkout: {checkout}")
+
+    # Collect listing detail URLs, from the search API data when it was captured
+    detail_urls = _detail_urls(page)
+
     print(f"[Step 06] Found {len(detail_urls)} detail URLs")
 
     assert len(detail_urls) > 0, "No listing detail URLs found on results page"
@@ -41,7 +308,7 @@ def run(page):
     print(f"[Step 06] Navigating to: {chosen_url[:80]}")
 
     page.goto(chosen_url, wait_until='domcontentloaded')
-    time.sleep(3)
+    settle(page, 3000, selector='h1', quiet_ms=500)
 
     current_url = page.url
     is_detail_page = '/rooms/' in current_url or '/h/' in current_url
@@ -49,106 +316,16 @@ def run(page):
 
     print(f"[Step 06] Detail page confirmed: {current_url[:100]}")
 
-    # Scrape title
-    try:
-        title = page.locator('h1').first.inner_text().strip()
-    except Exception:
-        title = 'N/A'
-
-    # Scrape subtitle
-    try:
-        subtitle = page.locator('h2').first.inner_text().strip()
-    except Exception:
-        subtitle = 'N/A'
-
-    # Scrape rating
-    try:
-        rating = page.evaluate("""() => {
-            const el = document.querySelector(
-                '[aria-label*="rating"], [data-testid*="rating"], span[class*="rating"]'
-            );
-            return el ? el.innerText.trim() : '';
-        }""")
-    except Exception:
-        rating = ''
-
-    # Scrape host name
-    try:
-        host = page.evaluate("""() => {
-            const els = Array.from(document.querySelectorAll('h2, h3'));
-            const el = els.find(e => (e.innerText || '').toLowerCase().includes('hosted by'));
-            return el ? el.innerText.trim() : '';
-        }""")
-    except Exception:
-        host = ''
-
-    # Scrape amenities
-    try:
-        amenities = page.evaluate("""() => {
-            const items = Array.from(document.querySelectorAll(
-                '[data-testid="amenity-row"] span, [data-testid*="amenities"] li, div[class*="amenity"]'
-            ));
-            return items.slice(0, 10).map(el => el.innerText.trim()).filter(Boolean);
-        }""")
-    except Exception:
-        amenities = []
-
-    # Scrape price on detail page
-    try:
-        price = page.evaluate("""() => {
-            const el = document.querySelector(
-                '[data-testid*="price"], span[class*="price"], ._tyxjp1'
-            );
-            return el ? el.innerText.trim() : '';
-        }""")
-    except Exception:
-        price = ''
-
-    # Scrape all images
-    image_urls = []
-    try:
-        images = page.query_selector_all('img[data-original-uri], img[src*="muscache"]')
-        for img in images:
-            src = img.get_attribute('src') or ''
-            if src and src not in image_urls:
-                image_urls.append(src)
-    except Exception:
-        pass
-
-    print(f"[Step 06] Title: {title}")
-    print(f"[Step 06] Subtitle: {subtitle}")
-    print(f"[Step 06] Host: {host}")
-    print(f"[Step 06] Rating: {rating}")
-    print(f"[Step 06] Price: {price}")
-    print(f"[Step 06] Amenities: {amenities[:5]}")
-    print(f"[Step 06] Images: {len(image_urls)}")
-
-    # Save each image as Result record
-    for img_url in image_urls:
-        save_result(
-            'Step 06 - Listing Image',
-            current_url,
-            True,
-            f'Image URL: {img_url}',
-            ''
-        )
-
-    # Save amenities
-    if amenities:
-        save_result(
-            'Step 06 - Listing Amenities',
-            current_url,
-            True,
-            f'Amenities: {", ".join(amenities)}',
-            ''
-        )
+    details = _extract_details(page)
 
-    comment = (
-        f"Country: {country} | Checkin: {checkin} | Checkout: {checkout} | "
-        f"Title: {title} | Subtitle: {subtitle} | Host: {host} | "
-        f"Rating: {rating} | Price: {price} | "
-        f"Amenities: {len(amenities)} | Images: {len(image_urls)}"
-    )
+    print(f"[Step 06] Title: {details['title']}")
+    print(f"[Step 06] Subtitle: {details['subtitle']}")
+    print(f"[Step 06] Host: {details['host']}")
+    print(f"[Step 06] Rating: {details['rating']}")
+    print(f"[Step 06] Price: {details['price']}")
+    print(f"[Step 06] Amenities: {details['amenities'][:5]}")
+    print(f"[Step 06] Images: {len(details['images'])}")
+    print(f"[Step 06] Source: {details['source']}")
 
-    save_result('Step 06 - Listing Details', current_url, True, comment, '')
-    print(f"[Step 06] Done — Title: {title} | Images: {len(image_urls)}")
\ No newline at end of file
+    _save_details(current_url, details)
+    print(f"[Step 06] Done — Title: {details['title']} | Images: {len(details['images'])}")
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from tracker.instrument import count_db_write
+from tracker.models import SuggestionCache
+
+
+def _stored(suggestions: list) -> list:
+    # ids and indexes are positional and re-read from the live list anyway
+    return [{'text': s['text'], 'hasIcon': s.get('hasIcon', False)} for s in suggestions]
+
+
+def fresh_entry(query: str):
+    """The cache entry for query if it was refreshed within the TTL, else None."""
+    cutoff = timezone.now() - timedelta(hours=settings.SUGGESTION_CACHE_TTL_HOURS)
+    return SuggestionCache.objects.filter(query=query, refreshed_at__gte=cutoff).first()
+
+
+def record_hit(entry: SuggestionCache, live: list) -> bool:
+    """Count a fresh-entry lookup; a differing live list replaces the cached one.
+
+    Returns whether the live list matched the cached one.
+    """
+    matches = [s['text'] for s in entry.suggestions] == [s['text'] for s in live]
+    updates = {'hits': F('hits') + 1}
+    if not matches:
+        updates.update(changed=F('changed') + 1, suggestions=_stored(live), refreshed_at=timezone.now())
+    SuggestionCache.objects.filter(pk=entry.pk).update(**updates)
+    count_db_write()
+    return matches
+
+
+def record_refresh(query: str, live: list, refresh_ms: int):
+    """Store the list a slow (character-by-character) lookup produced."""
+    values = {'suggestions': _stored(live), 'refresh_ms': refresh_ms, 'refreshed_at': timezone.now()}
+    updated = SuggestionCache.objects.filter(query=query).update(misses=F('misses') + 1, **values)
+    count_db_write()
+    if not updated:
+        SuggestionCache.objects.get_or_create(query=query, defaults={'misses': 1, **values})
+        count_db_write()
@@ -1,3 +1,1288 @@
-from django.test import TestCase
+import argparse
+import base64
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from airbnb_fixture import data, views
+from tracker.admin import ResultAdmin, TestCaseFilter
+from tracker.browser import LEAN_ARGS, launch_browser, read_endpoint
+from tracker.changelist import EstimatedCountPaginator, search_results
+from tracker.countries import order_candidates, record_attempt
+from tracker.instrument import percentile
+from tracker.management.commands.bench_automation import _stats
+from tracker.management.commands.run_automation import duration
+from tracker.models import ConsoleEvent, CountryStats, NetworkEvent, Result, Run, SuggestionCache, TestCaseName
+from tracker.monitor import EventWriter
+from tracker.network import NetworkRollupCollector, apply_network_profile
+from tracker.screenshots import artifact_path, capture, wait_for_screenshots
+from tracker.search_api import SearchApiCollector, parse_search_payload
+from tracker.services import ResultBuffer, buffered_results, flush_results, save_result, scenario_state
+from tracker.steps import fast_search, step05
+from tracker.steps.step01 import TOP_20_COUNTRIES, _candidates, shard_countries
+from tracker.steps.step05 import NEXT_PAGE_JS, SCRAPE_LISTINGS_JS, _crawl, _save_listings, _scrape_listings
+from tracker.steps.step06 import _details_from_state, _extract_details, _fan_out
+from tracker.suggestions import fresh_entry, record_hit, record_refresh
+from tracker.waits import settle, wait_for_dom_quiet, wait_report, wait_until_ready
 
-# Create your tests here.
+
+class FakeWaitPage:
+    """Answers the waits in tracker.waits without a browser."""
+
+    def __init__(self, url='https://www.airbnb.com/', visible=True, quiet=True):
+        self.url = url
+        self.visible = visible
+        self.quiet = quiet
+        self.timeouts = []
+
+    def wait_for_url(self, predicate, timeout, wait_until):
+        self.timeouts.append(timeout)
+        if not predicate(self.url):
+            raise TimeoutError('url')
+
+    def wait_for_load_state(self, state, timeout):
+        self.timeouts.append(timeout)
+
+    def locator(self, selector):
+        return self
+
+    @property
+    def first(self):
+        return self
+
+    def wait_for(self, state, timeout):
+        self.timeouts.append(timeout)
+        if not self.visible:
+            raise TimeoutError(state)
+
+    def evaluate(self, script, arg=None):
+        if isinstance(self.quiet, Exception):
+            raise self.quiet
+        return self.quiet
+
+
+class WaitTests(TestCase):
+
+    def test_ready(self):
+        page = FakeWaitPage(url='https://www.airbnb.com/s/Japan/homes')
+        self.assertTrue(wait_until_ready(page, url_contains='/s/', load_state='load', selector='h1',
+                                         quiet_ms=100, timeout_ms=2000))
+        self.assertTrue(all(0 < timeout <= 2000 for timeout in page.timeouts))
+
+    def test_timeout_is_false(self):
+        self.assertFalse(wait_until_ready(FakeWaitPage(), url_contains='/s/', timeout_ms=100))
+        self.assertFalse(wait_until_ready(FakeWaitPage(visible=False), selector='h1', timeout_ms=100))
+        self.assertFalse(wait_until_ready(FakeWaitPage(quiet=False), quiet_ms=100, timeout_ms=100))
+
+    def test_spent_timeout_never_becomes_zero(self):
+        # Playwright reads timeout=0 as "wait forever"
+        page = FakeWaitPage()
+        wait_until_ready(page, load_state='load', selector='h1', timeout_ms=0)
+        self.assertEqual(page.timeouts, [1, 1])
+
+    def test_dom_quiet_retries_until_the_deadline(self):
+        page = FakeWaitPage(quiet=RuntimeError('Execution context was destroyed'))
+        self.assertFalse(wait_for_dom_quiet(page, quiet_ms=50, timeout_ms=200))
+
+    def test_settle_records_the_saving(self):
+        with scenario_state(step='step01'):
+            self.assertTrue(settle(FakeWaitPage(), 3000, selector='h1'))
+            self.assertFalse(settle(FakeWaitPage(visible=False), 1000, selector='h1'))
+            report = wait_report()
+
+        self.assertEqual(report['step01']['fixed_ms'], 4000)
+        self.assertEqual(report['step01']['waits'], 2)
+        self.assertGreater(report['step01']['saved_ms'], 3000)
+
+
+class ResultBufferTests(TestCase):
+
+    def test_flush_on_exit(self):
+        with buffered_results(ResultBuffer(max_size=10)) as buffer:
+            save_result('Step 01 - Homepage Load', 'http://x', True)
+            save_result('Step 01 - Homepage Load', 'http://x', False, 'no field')
+            self.assertEqual(Result.objects.count(), 0)
+
+        self.assertEqual(buffer.written, 2)
+        self.assertEqual(list(Result.objects.order_by('id').values_list('passed', flat=True)), [True, False])
+
+    def test_flush_when_the_run_raises(self):
+        with self.assertRaises(RuntimeError):
+            with buffered_results():
+                save_result('Step 01 - Homepage Load', 'http://x', True)
+                raise RuntimeError('step failed')
+        self.assertEqual(Result.objects.count(), 1)
+
+    def test_flush_at_max_size(self):
+        buffer = ResultBuffer(max_size=2)
+        with buffered_results(buffer):
+            save_result('Step 05 - Listing Item', 'http://x', True)
+            save_result('Step 05 - Listing Item', 'http://x', True)
+            self.assertEqual(Result.objects.count(), 2)
+            save_result('Step 05 - Listing Item', 'http://x', True)
+            self.assertEqual((len(buffer.rows), flush_results()), (1, 1))
+            self.assertEqual(Result.objects.count(), 3)
+
+    def test_unbuffered_save(self):
+        self.assertEqual(flush_results(), 0)
+        save_result('Step 01 - Homepage Load', 'http://x', True)
+        self.assertEqual(Result.objects.count(), 1)
+
+
+class FakeEvaluatePage:
+    """Returns canned page.evaluate() results and records the calls."""
+
+    def __init__(self, *results, url='https://www.airbnb.com/s/Japan/homes'):
+        self.results = list(results)
+        self.url = url
+        self.calls = []
+
+    def evaluate(self, script, arg=None):
+        self.calls.append((script, arg))
+        return self.results.pop(0)
+
+
+class ScrapeListingsTests(TestCase):
+
+    def test_card_mapping(self):
+        page = FakeEvaluatePage({'selector': 'article', 'cards': [
+            {'title': 'Loft in Tokyo', 'price': '$120 night', 'image_url': 'https://a0.muscache.com/1.jpg',
+             'href': '/rooms/42?adults=2'},
+            {'title': 'Flat in Osaka', 'href': 'https://www.airbnb.com/rooms/43'},
+            {},
+        ]})
+
+        listings = _scrape_listings(page)
+
+        self.assertEqual(listings, [
+            {'title': 'Loft in Tokyo', 'price': '$120 night', 'image_url': 'https://a0.muscache.com/1.jpg',
+             'detail_url': 'https://www.airbnb.com/rooms/42?adults=2'},
+            {'title': 'Flat in Osaka', 'detail_url': 'https://www.airbnb.com/rooms/43'},
+        ])
+        [(script, arg)] = page.calls
+        self.assertEqual((script, arg['limit']), (SCRAPE_LISTINGS_JS, 20))
+
+    def test_no_cards(self):
+        self.assertEqual(_scrape_listings(FakeEvaluatePage({'selector': '', 'cards': []})), [])
+
+
+class FakeRequest:
+
+    def __init__(self, url, resource_type='document', response_end=-1, sizes=None, failure=None):
+        self.url = url
+        self.resource_type = resource_type
+        self.timing = {'responseEnd': response_end}
+        self.failure = failure
+        self._sizes = sizes
+
+    def sizes(self):
+        if self._sizes is None:
+            raise RuntimeError('Unable to fetch sizes for failed request')
+        return self._sizes
+
+
+class FakeRoute:
+
+    def __init__(self, url, resource_type='document'):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    def abort(self, error_code):
+        self.outcome = error_code
+
+    def fallback(self):
+        self.outcome = 'fallback'
+
+
+class FakeResponse:
+
+    def __init__(self, url='https://www.airbnb.com/', headers=None, request=None, payload=None, ok=True,
+                 frame_url='https://www.airbnb.com/s/Japan/homes'):
+        self.url = url
+        self.headers = headers or {}
+        self.request = request
+        self.payload = payload
+        self.ok = ok
+        self.frame_url = frame_url
+
+    @property
+    def frame(self):
+        if self.frame_url is None:
+            raise RuntimeError('Service Worker responses do not have a frame')
+        return SimpleNamespace(url=self.frame_url)
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+class FakeContext:
+    """Collects the listeners and routes a BrowserContext would get."""
+
+    def __init__(self):
+        self.listeners = {}
+        self.routes = []
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    def emit(self, event, value):
+        for handler in self.listeners.get(event, []):
+            handler(value)
+
+    def request(self, url, resource_type='document') -> str:
+        route = FakeRoute(url, resource_type)
+        for _, handler in self.routes:
+            handler(route)
+        return route.outcome or 'continued'
+
+
+class NetworkProfileTests(TestCase):
+
+    def test_full_installs_no_route(self):
+        context = FakeContext()
+        apply_network_profile(context, 'full')
+        self.assertEqual(context.routes, [])
+
+    def test_lean(self):
+        context = FakeContext()
+        stats = apply_network_profile(context, 'lean')
+
+        outcomes = [
+            context.request('https://www.airbnb.com/s/Japan/homes'),
+            context.request('https://a0.muscache.com/im/pictures/1.jpg', 'image'),
+            context.request('https://fonts.example.com/a.woff2', 'font'),
+            context.request('https://www.google-analytics.com/collect', 'xhr'),
+            context.request('https://a0.muscache.com/airbnb/static/app.css', 'stylesheet'),
+        ]
+
+        self.assertEqual(outcomes, ['fallback', 'blockedbyclient', 'blockedbyclient', 'blockedbyclient', 'fallback'])
+        self.assertEqual((stats.blocked, stats.blocked_by_type), (3, {'image': 1, 'font': 1, 'xhr': 1}))
+
+    def test_text_only_blocks_styles_and_the_image_cdn(self):
+        context = FakeContext()
+        apply_network_profile(context, 'text-only')
+        self.assertEqual(context.request('https://www.airbnb.com/app.css', 'stylesheet'), 'blockedbyclient')
+        self.assertEqual(context.request('https://a0.muscache.com/app.js', 'script'), 'blockedbyclient')
+        self.assertEqual(context.request('https://www.airbnb.com/app.js', 'script'), 'fallback')
+
+    def test_loaded_bytes(self):
+        context = FakeContext()
+        stats = apply_network_profile(context, 'lean')
+        # Chunked: no content-length, but sizes() knows the transfer size
+        chunked = FakeRequest('https://www.airbnb.com/', sizes={'responseBodySize': 1200, 'responseHeadersSize': 300})
+        requests = [
+            (FakeRequest('https://www.airbnb.com/a.js'), {'content-length': '500'}),
+            (FakeRequest('https://www.airbnb.com/b.js'), {'content-length': 'n/a'}),
+            (chunked, {}),
+        ]
+        for request, headers in requests:
+            context.emit('response', FakeResponse(request.url, headers, request))
+            context.emit('requestfinished', request)
+        self.assertEqual((stats.loaded, stats.loaded_bytes), (3, 2000))
+        self.assertIn('Loaded bytes: 2000', stats.summary())
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            apply_network_profile(FakeContext(), 'fast')
+
+
+class PercentileTests(TestCase):
+
+    def test_interpolation(self):
+        values = [40, 10, 30, 20]
+        self.assertEqual(percentile(values, 0), 10)
+        self.assertEqual(percentile(values, 50), 25)
+        self.assertEqual(percentile(values, 100), 40)
+        self.assertAlmostEqual(percentile(values, 95), 38.5)
+
+    def test_small_samples(self):
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_stats(self):
+        self.assertEqual(_stats(list(range(1, 101))), {'p50': 50.5, 'p95': 95.0, 'p99': 99.0, 'mean': 50.5, 'n': 100})
+        self.assertEqual(_stats([]), {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'mean': 0.0, 'n': 0})
+
+
+def png_bytes(color='red') -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class FakeScreenshotPage:
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+
+    def screenshot(self, **kwargs):
+        return self.raw
+
+
+class ScreenshotTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch('tracker.screenshots.SCREENSHOT_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_content_hash_path(self):
+        raw = png_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        filename = capture(FakeScreenshotPage(raw), 'home', fmt='webp')
+        wait_for_screenshots(timeout=10)
+
+        self.assertEqual(filename, os.path.join(digest[:2], f'{digest}.webp'))
+        with Image.open(artifact_path(filename)) as image:
+            self.assertEqual(image.format, 'WEBP')
+
+    def test_identical_captures_share_a_file(self):
+        first = capture(FakeScreenshotPage(png_bytes('red')), 'first', fmt='png')
+        second = capture(FakeScreenshotPage(png_bytes('red')), 'second', fmt='png')
+        other = capture(FakeScreenshotPage(png_bytes('blue')), 'other', fmt='png')
+        wait_for_screenshots(timeout=10)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(os.path.exists(artifact_path(other)))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            capture(FakeScreenshotPage(png_bytes()), 'home', fmt='gif')
+
+
+class GatedEventWriter(EventWriter):
+    """Holds the first batch until released, so the queue can be filled meanwhile."""
+
+    def __init__(self, maxsize: int):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+        super().__init__(maxsize)
+
+    def _write(self, batch: list):
+        self.entered.set()
+        self.release.wait(5)
+        self.batches.append(len(batch))
+        super()._write(batch)
+
+
+class EventWriterTests(TransactionTestCase):
+
+    @staticmethod
+    def console(n: int) -> ConsoleEvent:
+        return ConsoleEvent(level='error', text=f'error {n}', url='https://www.airbnb.com/')
+
+    @mock.patch('tracker.monitor.EVENT_BATCH_SIZE', 2)
+    def test_batches(self):
+        writer = GatedEventWriter(maxsize=10)
+        writer.put(self.console(0))
+        self.assertTrue(writer.entered.wait(5))
+        for n in range(1, 5):
+            writer.put(self.console(n))
+        writer.put(NetworkEvent(method='GET', status=503, resource_type='xhr', url='https://www.airbnb.com/api'))
+        writer.release.set()
+        writer.stop()
+
+        self.assertEqual(writer.batches, [1, 2, 2, 1])
+        self.assertEqual((writer.written, writer.dropped), (6, 0))
+        self.assertEqual((ConsoleEvent.objects.count(), NetworkEvent.objects.count()), (5, 1))
+
+    def test_full_queue_drops(self):
+        writer = GatedEventWriter(maxsize=1)
+        writer.put(self.console(0))
+        self.assertTrue(writer.entered.wait(5))
+        writer.put(self.console(1))
+        writer.put(self.console(2))
+        writer.release.set()
+        writer.stop()
+
+        self.assertEqual((writer.written, writer.dropped), (2, 1))
+        self.assertEqual(ConsoleEvent.objects.count(), 2)
+
+
+class NetworkRollupTests(TestCase):
+
+    def setUp(self):
+        self.state = {'step': 'step01'}
+        self.context = FakeContext()
+        self.collector = NetworkRollupCollector(self.state)
+        self.collector.attach(self.context)
+
+    def finish(self, url, resource_type='document', size=None, response_end=100, failure=None, sizes=None):
+        request = FakeRequest(url, resource_type, response_end, sizes, failure)
+        if size is not None:
+            self.context.emit('response', FakeResponse(url, {'content-length': str(size)}, request))
+        self.context.emit('requestfailed' if failure else 'requestfinished', request)
+
+    def test_rollup_per_step(self):
+        self.finish('https://www.airbnb.com/', size=1000, response_end=120)
+        self.finish('https://a0.muscache.com/1.jpg', 'image', size=500, response_end=80)
+        self.finish('https://www.airbnb.com/api/v3/StaysSearch', 'fetch', response_end=-1, failure='net::ERR_FAILED')
+        self.state['step'] = 'step05'
+        self.finish('https://www.airbnb.com/s/Japan/homes', size=2000)
+
+        step01, step05 = self.collector.to_models(run_id=None)
+
+        self.assertEqual((step01.step, step01.requests, step01.failed, step01.bytes), ('step01', 3, 1, 1500))
+        self.assertEqual((step01.p50_ms, step01.p95_ms), (100.0, 118.0))
+        self.assertEqual(step01.by_resource_type['image'],
+                         {'requests': 1, 'failed': 0, 'blocked': 0, 'bytes': 500, 'p50_ms': 80.0, 'p95_ms': 80.0})
+        self.assertEqual(step01.by_host['www.airbnb.com']['requests'], 2)
+        self.assertEqual((step05.step, step05.requests, step05.bytes), ('step05', 1, 2000))
+
+    @mock.patch('tracker.network.ROLLUP_MAX_HOSTS', 2)
+    def test_host_cap(self):
+        for host, count in [('a.com', 4), ('b.com', 3), ('c.com', 2), ('d.com', 1)]:
+            for _ in range(count):
+                self.finish(f'https://{host}/', size=10)
+
+        [rollup] = self.collector.to_models()
+
+        self.assertEqual(list(rollup.by_host), ['a.com', 'b.com', 'other'])
+        self.assertEqual(rollup.by_host['other'], {'requests': 3, 'failed': 0, 'blocked': 0, 'bytes': 30, 'hosts': 2})
+        self.assertEqual(rollup.requests, 10)
+
+    def test_blocked_requests_are_not_failures(self):
+        self.finish('https://a0.muscache.com/1.jpg', 'image', response_end=-1, failure='net::ERR_BLOCKED_BY_CLIENT')
+        self.finish('https://www.airbnb.com/api', 'fetch', response_end=-1, failure='net::ERR_CONNECTION_RESET')
+
+        [rollup] = self.collector.to_models()
+
+        self.assertEqual((rollup.requests, rollup.failed, rollup.blocked), (2, 1, 1))
+        self.assertEqual(rollup.by_resource_type['image']['blocked'], 1)
+
+    def test_bytes_prefer_transfer_sizes(self):
+        # Compressed: the header counts the body only, sizes() the bytes on the wire
+        self.finish('https://www.airbnb.com/', size=5000,
+                    sizes={'responseBodySize': 1800, 'responseHeadersSize': 200})
+        self.finish('https://www.airbnb.com/app.js', 'script', size=700)
+
+        [rollup] = self.collector.to_models()
+
+        self.assertEqual(rollup.bytes, 2700)
+
+
+class SaveResultTests(TestCase):
+
+    def test_run_step_and_status(self):
+        run = Run.objects.create(scenario='test')
+        with scenario_state(step='step05', run_id=str(run.pk)):
+            save_result('Step 05 - Results Page', 'http://x', True)
+            save_result('Network Profile', 'http://x', False)
+            save_result('Step 05 - Failure', 'http://x', False, 'timeout', status='error')
+
+        self.assertEqual(list(run.results.order_by('id').values_list('step', 'status')), [
+            ('step05', 'pass'), ('', 'fail'), ('step05', 'error'),
+        ])
+
+
+class ResultRunBackfillTests(TransactionTestCase):
+    """0007 groups the results that existed before it into legacy runs."""
+
+    before = [('tracker', '0006_networkrollup')]
+    after = [('tracker', '0007_result_run_schema')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        OldResult = executor.loader.project_state(self.before).apps.get_model('tracker', 'Result')
+
+        start = timezone.now() - timedelta(days=1)
+        rows = [
+            ('Step 01 - Homepage Load', True, ''),
+            ('Step 02 - Country Selected', True, ''),
+            ('Step 05 - Results Page', False, 'no results'),
+            ('Step 01 - Homepage Load', True, ''),
+            ('Step 03 - Calendar Opened', True, ''),
+            ('Step 04 - Failure', False, 'timeout'),
+        ]
+        for offset, (test_case, passed, comment) in enumerate(rows):
+            result = OldResult.objects.create(test_case=test_case, url='http://x', passed=passed, comment=comment)
+            # created_at is auto_now_add, so it is set after the insert
+            OldResult.objects.filter(pk=result.pk).update(created_at=start + timedelta(seconds=2 * offset))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        self.apps = executor.loader.project_state(self.after).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        NewResult = self.apps.get_model('tracker', 'Result')
+        NewRun = self.apps.get_model('tracker', 'Run')
+
+        first, second = NewRun.objects.order_by('id')
+        self.assertEqual((first.scenario, first.passed, first.error, first.duration_ms), ('legacy', False, '', 4000))
+        self.assertEqual((second.passed, second.error, second.duration_ms), (False, 'timeout', 4000))
+
+        self.assertEqual(list(NewResult.objects.order_by('id').values_list('run_id', 'step', 'status', 'duration_ms')), [
+            (first.pk, 'step01', 'pass', 0),
+            (first.pk, 'step01', 'pass', 2000),
+            (first.pk, 'step05', 'fail', 2000),
+            (second.pk, 'step01', 'pass', 0),
+            (second.pk, 'step03', 'pass', 2000),
+            (second.pk, 'step04', 'error', 2000),
+        ])
+
+
+class ResultChangelistTests(TestCase):
+
+    def setUp(self):
+        rows = [
+            ('Step 03 - Calendar Opened', 'Month: March 2027'),
+            ('Step 05 - Results Page', 'Country: Japan | Listings scraped: 18'),
+            ('Step 05 - Listing Item', 'Country: Japan | Title: Loft in Tokyo'),
+        ]
+        self.results = [Result.objects.create(test_case=t, url='http://x', passed=True, comment=c) for t, c in rows]
+
+    def search(self, term) -> list:
+        return sorted(search_results(Result.objects.all(), term).values_list('id', flat=True))
+
+    def test_search(self):
+        calendar, page, item = (r.pk for r in self.results)
+        self.assertEqual(self.search('japan'), [page, item])
+        self.assertEqual(self.search('Step 05'), [page, item])
+        self.assertEqual(self.search('calen'), [calendar])
+        self.assertEqual(self.search('list tok'), [item])
+        self.assertEqual(self.search('"--'), [calendar, page, item])
+
+    def test_search_follows_updates_and_deletes(self):
+        calendar, page, item = self.results
+        Result.objects.filter(pk=calendar.pk).update(comment='Country: Japan')
+        item.delete()
+        self.assertEqual(self.search('japan'), [calendar.pk, page.pk])
+
+    def test_unfiltered_count_is_estimated(self):
+        # prune_results deletes from the low end of the id range, which keeps the estimate exact
+        self.results[0].delete()
+        paginator = EstimatedCountPaginator(Result.objects.all(), 100)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 2)
+
+    @mock.patch('tracker.changelist.COUNT_CAP', 2)
+    def test_filtered_count_is_capped(self):
+        self.assertEqual(EstimatedCountPaginator(Result.objects.filter(passed=True), 100).count, 2)
+        self.assertEqual(EstimatedCountPaginator(Result.objects.filter(step='step05'), 100).count, 0)
+
+    @mock.patch('tracker.services._known_test_cases', set())
+    def test_test_case_names(self):
+        with self.assertNumQueries(2):
+            save_result('Step 01 - Homepage Load', 'http://x', True)
+        with self.assertNumQueries(1):
+            save_result('Step 01 - Homepage Load', 'http://x', True)
+        self.assertIn('Step 01 - Homepage Load', TestCaseName.objects.values_list('name', flat=True))
+
+    def test_filter_skips_names_without_results(self):
+        TestCaseName.objects.bulk_create([TestCaseName(name='Step 05 - Results Page'), TestCaseName(name='Pruned')])
+
+        lookups = TestCaseFilter(None, {}, Result, ResultAdmin).lookups(None, None)
+
+        self.assertEqual(lookups, [('Step 05 - Results Page', 'Step 05 - Results Page')])
+
+
+class PruneResultsTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive_dir = os.path.join(directory.name, 'archive')
+        self.screenshot_dir = os.path.join(directory.name, 'screenshots')
+        patcher = mock.patch('tracker.management.commands.prune_results.SCREENSHOT_DIR', self.screenshot_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.old_at = timezone.now() - timedelta(days=40)
+        self.old_run = self.run_at(self.old_at)
+        self.new_run = self.run_at(timezone.now())
+        # Started before the cutoff but still has a recent row, so it must stay
+        self.open_run = self.run_at(self.old_at)
+        self.old = [self.result_at(self.old_run, self.old_at, f'old-{n}') for n in range(3)]
+        self.result_at(self.old_run, self.old_at, '', screenshot=os.path.join('ab', 'old.webp'))
+        self.result_at(self.new_run, timezone.now(), 'new', screenshot=os.path.join('cd', 'new.webp'))
+        self.result_at(self.open_run, timezone.now(), 'late')
+
+        for name in ('ab/old.webp', 'cd/new.webp', 'ef/orphan.webp'):
+            path = os.path.join(self.screenshot_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 10)
+            os.utime(path, (time.time() - 3600, time.time() - 3600))
+
+    @staticmethod
+    def run_at(when) -> Run:
+        run = Run.objects.create(scenario='test', finished_at=when)
+        Run.objects.filter(pk=run.pk).update(started_at=when)
+        return run
+
+    @staticmethod
+    def result_at(run, when, comment, screenshot='') -> Result:
+        result = Result.objects.create(run=run, test_case='Step 01 - Homepage Load', url='http://x',
+                                       passed=True, comment=comment, screenshot=screenshot)
+        Result.objects.filter(pk=result.pk).update(created_at=when)
+        return result
+
+    def prune(self, *args) -> str:
+        out = io.StringIO()
+        call_command('prune_results', '--archive-dir', self.archive_dir, '--batch-size', '2',
+                     '--pause', '0', '--no-vacuum', *args, stdout=out)
+        return out.getvalue()
+
+    def screenshots(self) -> list:
+        return sorted(os.path.relpath(os.path.join(root, name), self.screenshot_dir)
+                      for root, _, files in os.walk(self.screenshot_dir) for name in files)
+
+    def archived(self, table) -> list:
+        path = os.path.join(self.archive_dir, table, f'{self.old_at.date().isoformat()}.ndjson.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_prune(self):
+        output = self.prune()
+
+        self.assertIn('Result: deleted 4 rows', output)
+        self.assertEqual(sorted(Result.objects.values_list('comment', flat=True)), ['late', 'new'])
+        self.assertEqual(set(Run.objects.values_list('pk', flat=True)), {self.new_run.pk, self.open_run.pk})
+        self.assertEqual([row['comment'] for row in self.archived('tracker_result')], ['old-0', 'old-1', 'old-2', ''])
+        self.assertEqual([row['id'] for row in self.archived('tracker_run')], [self.old_run.pk])
+        self.assertEqual(self.screenshots(), [os.path.join('cd', 'new.webp')])
+
+    def test_rerun_after_an_interrupted_delete(self):
+        # The first batch is archived, then the process dies before deleting it
+        with mock.patch.object(QuerySet, 'delete', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.prune()
+        self.assertEqual(len(self.archived('tracker_result')), 2)
+        self.assertEqual(Result.objects.count(), 6)
+
+        self.prune()
+
+        self.assertEqual([row['comment'] for row in self.archived('tracker_result')], ['old-0', 'old-1', 'old-2', ''])
+        self.assertEqual(Result.objects.count(), 2)
+
+    def test_no_archive(self):
+        self.prune('--no-archive')
+        self.assertEqual(Result.objects.count(), 2)
+        self.assertFalse(os.path.exists(self.archive_dir))
+
+    def test_dry_run(self):
+        output = self.prune('--dry-run')
+
+        self.assertIn('Result: 4 rows', output)
+        self.assertIn('Run: 1 rows', output)
+        self.assertEqual(Result.objects.count(), 6)
+        self.assertFalse(os.path.exists(self.archive_dir))
+        self.assertEqual(len(self.screenshots()), 3)
+        # The orphan and the screenshot of an expired row, as a real prune removes
+        self.assertIn('Screenshots: would remove 2 unreferenced files', output)
+
+    def test_screenshot_grace(self):
+        os.utime(os.path.join(self.screenshot_dir, 'ef', 'orphan.webp'))
+        self.prune('--days', '100')
+        self.assertEqual(len(self.screenshots()), 3)
+
+
+class FakeChromium:
+
+    def __init__(self):
+        self.calls = []
+
+    def launch(self, **options):
+        self.calls.append(('launch', options))
+        return 'launched'
+
+    def connect(self, ws_endpoint):
+        self.calls.append(('connect', ws_endpoint))
+        return 'connected'
+
+
+class FakePlaywright:
+
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+
+class LaunchBrowserTests(TestCase):
+
+    def launch(self, *args, **kwargs) -> tuple:
+        playwright = FakePlaywright()
+        browser, startup_ms = launch_browser(playwright, *args, **kwargs)
+        self.assertGreaterEqual(startup_ms, 0)
+        [call] = playwright.chromium.calls
+        return browser, call
+
+    def test_profiles(self):
+        self.assertEqual(self.launch('headed'), ('launched', ('launch', {'headless': False})))
+        self.assertEqual(self.launch('headless')[1], ('launch', {'headless': True, 'channel': 'chromium'}))
+        self.assertEqual(self.launch('headless-shell')[1], ('launch', {'headless': True}))
+
+        _, (_, options) = self.launch('lean')
+        self.assertEqual(options, {'headless': True, 'args': LEAN_ARGS})
+        # Callers may extend the args without changing the profile
+        self.assertIsNot(options['args'], LEAN_ARGS)
+
+    def test_warm_connect_ignores_the_profile(self):
+        self.assertEqual(self.launch('lean', ws_endpoint='ws://127.0.0.1:9222/abc'),
+                         ('connected', ('connect', 'ws://127.0.0.1:9222/abc')))
+
+    def test_launch_overrides(self):
+        # Repeat mode keeps Chromium alive on SIGINT/SIGTERM
+        overrides = {'handle_sigint': False, 'handle_sigterm': False}
+        self.assertEqual(self.launch('headless-shell', **overrides)[1],
+                         ('launch', {'headless': True, **overrides}))
+        self.assertEqual(self.launch('headless-shell', 'ws://127.0.0.1:9222/abc', **overrides)[1],
+                         ('connect', 'ws://127.0.0.1:9222/abc'))
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            launch_browser(FakePlaywright(), 'turbo')
+
+    def test_read_endpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '.browser-endpoint')
+            with override_settings(BROWSER_ENDPOINT_FILE=path):
+                self.assertEqual(read_endpoint(), '')
+                with open(path, 'w') as f:
+                    f.write('ws://127.0.0.1:9222/abc\n')
+                self.assertEqual(read_endpoint(), 'ws://127.0.0.1:9222/abc')
+
+
+class RepeatModeTests(TestCase):
+
+    def test_duration(self):
+        self.assertEqual(duration('90'), 90)
+        self.assertEqual(duration('90s'), 90)
+        self.assertEqual(duration('1.5m'), 90)
+        self.assertEqual(duration(' 2h '), 7200)
+
+    def test_invalid_duration(self):
+        for value in ['', 'ten', '5d', '-1m']:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                duration(value)
+
+    def test_every_runs_one_scenario(self):
+        with self.assertRaisesMessage(CommandError, '--every repeats a single scenario'):
+            call_command('run_automation', '--every', '10m', '--scenarios', '2')
+
+
+class FakeDetailPage(FakeWaitPage):
+    """A listing detail page; `broken` URLs never show their title, `crashing` ones fail to scrape."""
+
+    def __init__(self, context=None, broken=(), crashing=()):
+        super().__init__(url='about:blank')
+        self.context = context
+        self.broken = set(broken)
+        self.crashing = set(crashing)
+        self.closed = False
+        self.state = []
+        self.scripts = []
+
+    def goto(self, url, wait_until=None):
+        self.url = url
+
+    def wait_for(self, state, timeout):
+        if self.url in self.broken:
+            raise TimeoutError(state)
+
+    def evaluate(self, script, arg=None):
+        self.scripts.append(script)
+        if self.url in self.crashing:
+            raise RuntimeError('Execution context was destroyed')
+        if 'data-deferred-state' in script:
+            return self.state
+        return {'title': f'Listing {self.url}', 'subtitle': 'N/A', 'rating': '', 'host': '',
+                'amenities': ['Wifi'], 'price': '$90 night', 'images': ['https://a0.muscache.com/1.jpg']}
+
+    def close(self):
+        if self.context and self.context.close_error:
+            raise self.context.close_error
+        self.closed = True
+
+
+class FakeDetailContext:
+
+    def __init__(self, broken=(), crashing=(), close_error=None):
+        self.broken = broken
+        self.crashing = crashing
+        self.close_error = close_error
+        self.pages = []
+
+    def new_page(self):
+        page = FakeDetailPage(self, self.broken, self.crashing)
+        self.pages.append(page)
+        return page
+
+
+class FanOutTests(TestCase):
+
+    def test_every_url_is_visited(self):
+        urls = [f'https://www.airbnb.com/rooms/{n}' for n in range(5)]
+        context = FakeDetailContext(broken=[urls[3]])
+
+        with scenario_state(country='Japan'):
+            scraped = _fan_out(FakeDetailPage(context), urls, concurrency=2)
+
+        self.assertEqual(scraped, 4)
+        self.assertEqual(len(context.pages), 2)
+        self.assertTrue(all(page.closed for page in context.pages))
+        details = Result.objects.filter(test_case='Step 06 - Listing Details')
+        self.assertEqual(sorted(details.values_list('url', 'passed')),
+                         [(url, url != urls[3]) for url in urls])
+        self.assertEqual(Result.objects.filter(test_case='Step 06 - Listing Image').count(), 4)
+
+    def test_a_failing_page_does_not_stop_the_others(self):
+        urls = [f'https://www.airbnb.com/rooms/{n}' for n in range(4)]
+        context = FakeDetailContext(crashing=[urls[0]], close_error=RuntimeError('Target closed'))
+
+        with scenario_state(country='Japan'):
+            scraped = _fan_out(FakeDetailPage(context), urls, concurrency=2)
+
+        self.assertEqual(scraped, 3)
+        failed = Result.objects.get(test_case='Step 06 - Listing Details', passed=False)
+        self.assertEqual(failed.url, urls[0])
+        self.assertTrue(failed.comment.startswith('Scrape failed: RuntimeError'))
+
+
+class FakeResultsPage(FakeWaitPage):
+    """Paginated results: pages[n] holds the room ids shown on page n + 1."""
+
+    def __init__(self, pages: list, failing=()):
+        super().__init__(url='https://www.airbnb.com/s/Japan/homes?page=1')
+        self.pages = pages
+        self.failing = set(failing)
+        self.visited = [1]
+
+    @property
+    def number(self) -> int:
+        return int(self.url.rsplit('=', 1)[1])
+
+    def goto(self, url, wait_until=None):
+        number = int(url.rsplit('=', 1)[1])
+        if number in self.failing:
+            raise TimeoutError(f'page {number}')
+        self.url = url
+        self.visited.append(number)
+
+    def evaluate(self, script, arg=None):
+        if script == NEXT_PAGE_JS:
+            return f'?page={self.number + 1}' if self.number < len(self.pages) else None
+        if script == SCRAPE_LISTINGS_JS:
+            return {'selector': 'article', 'cards': [
+                {'title': f'Room {room}', 'href': f'/rooms/{room}?adults=2'} for room in self.pages[self.number - 1]
+            ]}
+        return True
+
+
+class CrawlTests(TestCase):
+
+    pages = [[1, 2, 3], [3, 4, 5], [5, 6, 7]]
+
+    def test_save_listings_dedupes_by_room(self):
+        listings = [
+            {'title': 'A', 'detail_url': 'https://www.airbnb.com/rooms/1?adults=2'},
+            {'title': 'A again', 'detail_url': 'https://www.airbnb.com/rooms/1?check_in=2027-03-01'},
+            {'title': 'B', 'detail_url': 'https://www.airbnb.com/rooms/plus/2'},
+            {'title': 'C', 'price': '$80'},
+            {'title': 'C', 'price': '$80'},
+        ]
+        seen = {'2'}
+
+        saved, duplicates = _save_listings(listings, 'Japan', 'https://www.airbnb.com/s/Japan/homes', seen)
+
+        self.assertEqual([l['title'] for l in saved], ['A', 'C'])
+        self.assertEqual((duplicates, seen), (3, {'1', '2', 'C|$80'}))
+        self.assertEqual(Result.objects.filter(test_case='Step 05 - Listing Item').count(), 2)
+
+    def test_save_listings_budget(self):
+        listings = [{'detail_url': f'https://www.airbnb.com/rooms/{n}'} for n in range(5)]
+        saved, _ = _save_listings(listings, 'Japan', '', set(), limit=2)
+        self.assertEqual(len(saved), 2)
+
+    def crawl(self, page, max_pages=0, max_listings=0) -> tuple:
+        seen = {'1', '2', '3'}
+        detail_urls = []
+        crawled = _crawl(page, 'Japan', seen, detail_urls, max_pages, max_listings)
+        return crawled, seen, detail_urls
+
+    def test_crawl_to_the_last_page(self):
+        page = FakeResultsPage(self.pages)
+        crawled, seen, detail_urls = self.crawl(page)
+
+        self.assertEqual((crawled, page.visited), (3, [1, 2, 3]))
+        self.assertEqual(seen, {str(n) for n in range(1, 8)})
+        self.assertEqual(detail_urls, [f'https://www.airbnb.com/rooms/{n}?adults=2' for n in (4, 5, 6, 7)])
+        comments = Result.objects.filter(test_case='Step 05 - Crawl Page').order_by('id').values_list('comment', flat=True)
+        self.assertTrue(comments[0].startswith('Page: 2 | Cards: 3 | New: 2 | Duplicates: 1 | Total listings: 5'))
+
+    def test_crawl_limits(self):
+        page = FakeResultsPage(self.pages)
+        self.assertEqual(self.crawl(page, max_pages=2)[0], 2)
+        self.assertEqual(page.visited, [1, 2])
+
+        crawled, seen, _ = self.crawl(FakeResultsPage(self.pages), max_listings=4)
+        self.assertEqual((crawled, len(seen)), (2, 4))
+
+    def test_crawl_stops_at_a_failed_page(self):
+        page = FakeResultsPage(self.pages, failing=[3])
+        crawled, seen, _ = self.crawl(page)
+
+        self.assertEqual((crawled, page.visited, len(seen)), (2, [1, 2], 5))
+        failed = Result.objects.get(test_case='Step 05 - Crawl Page', passed=False)
+        self.assertTrue(failed.comment.startswith('Page: 3 | Navigation failed: TimeoutError'))
+
+
+class DetailsFromStateTests(TestCase):
+
+    def test_fixture_state(self):
+        listing = data.listing(7)
+        scripts = ['not json', json.dumps(data.listing_state(listing))]
+
+        details = _details_from_state(scripts, 'http://testserver/airbnb/rooms/7')
+
+        self.assertEqual(details['title'], listing['name'])
+        self.assertEqual(details['subtitle'], listing['title'])
+        self.assertEqual(details['host'], f"Hosted by {listing['host']}")
+        self.assertEqual(details['rating'], f"{listing['rating']} · {listing['reviews']} reviews")
+        self.assertEqual(details['amenities'], listing['amenities'])
+        self.assertEqual(details['price'], f"${listing['price']} night")
+        self.assertEqual(details['images'][0], f"http://testserver{listing['images'][0]}")
+        self.assertEqual(len(details['images']), len(listing['images']))
+        self.assertEqual(details['source'], 'page state')
+
+    def test_no_usable_state(self):
+        self.assertIsNone(_details_from_state([], 'http://x'))
+        self.assertIsNone(_details_from_state(['{"broken"', None], 'http://x'))
+        self.assertIsNone(_details_from_state([json.dumps({'sections': []})], 'http://x'))
+
+    def test_dom_fallback(self):
+        page = FakeDetailPage()
+        page.goto('https://www.airbnb.com/rooms/7')
+        self.assertEqual(_extract_details(page)['source'], 'DOM')
+
+        page.state = [json.dumps(data.listing_state(data.listing(7)))]
+        page.scripts = []
+        self.assertEqual(_extract_details(page)['source'], 'page state')
+        self.assertEqual(len(page.scripts), 1)
+
+    def test_fields_missing_from_the_state_come_from_the_dom(self):
+        state = data.listing_state(data.listing(7))
+        sections = state['niobeMinimalClientData'][0][1]['data']['presentation']['stayProductDetailPage']
+        sections['sections']['sections'] = [
+            s for s in sections['sections']['sections'] if s['sectionComponentType'] != 'BOOK_IT_SIDEBAR'
+        ]
+        page = FakeDetailPage()
+        page.goto('https://www.airbnb.com/rooms/7')
+        page.state = [json.dumps(state)]
+
+        details = _extract_details(page)
+
+        self.assertEqual(details['price'], '$90 night')
+        self.assertEqual(details['source'], 'page state + DOM (price)')
+        self.assertEqual(details['amenities'], data.listing(7)['amenities'])
+
+    def test_empty_fields_the_state_has_are_kept(self):
+        listing = {**data.listing(7), 'amenities': []}
+        state = data.listing_state(listing)
+        page = FakeDetailPage()
+        page.goto('https://www.airbnb.com/rooms/7')
+        page.state = [json.dumps(state).replace(json.dumps(listing['title']), '""')]
+
+        details = _extract_details(page)
+
+        self.assertEqual((details['amenities'], details['subtitle']), ([], 'N/A'))
+        self.assertEqual(details['source'], 'page state')
+        self.assertEqual(len(page.scripts), 1)
+
+
+def search_payload(*room_ids) -> dict:
+    """A StaysSearch response of the stand-in site."""
+    return {'data': {'presentation': {'staysSearch': {'results': {
+        'searchResults': [data.search_result(data.listing(room_id, 'Lisbon, Portugal')) for room_id in room_ids],
+    }}}}}
+
+
+class SearchApiTests(TestCase):
+
+    def test_fixture_payload(self):
+        listing = data.listing(42, 'Lisbon, Portugal')
+
+        [parsed] = parse_search_payload(search_payload(42), 'http://testserver/airbnb')
+
+        self.assertEqual(parsed['room_id'], '42')
+        self.assertEqual(parsed['title'], listing['title'])
+        self.assertEqual(parsed['price'], f"${listing['price']} night")
+        self.assertEqual(parsed['rating'], f"{listing['rating']} ({listing['reviews']})")
+        self.assertEqual((parsed['lat'], parsed['lng']), (listing['lat'], listing['lng']))
+        self.assertEqual(parsed['images'], listing['images'])
+        self.assertEqual(parsed['image_url'], listing['images'][0])
+        self.assertEqual(parsed['detail_url'], 'http://testserver/airbnb/rooms/42')
+
+    def test_encoded_id_and_empty_fields(self):
+        encoded = base64.b64encode(b'DemandStayListing:1234').decode().rstrip('=')
+        payload = [
+            {'listing': {'id': encoded}},
+            {'listing': {'id': 'not-a-room'}},
+        ]
+
+        self.assertEqual(parse_search_payload(payload, 'https://www.airbnb.com'), [
+            {'room_id': '1234', 'detail_url': 'https://www.airbnb.com/rooms/1234'},
+        ])
+
+    def test_collector(self):
+        state = {}
+        context = FakeContext()
+        SearchApiCollector(state).attach(context)
+        api_url = 'https://www.airbnb.com/api/v3/StaysSearch?operationName=StaysSearch'
+
+        context.emit('response', FakeResponse(api_url, payload=search_payload(1, 2)))
+        self.assertEqual([l['room_id'] for l in state['search_api_listings']], ['1', '2'])
+
+        context.emit('response', FakeResponse(api_url, payload=ValueError('gone')))
+        context.emit('response', FakeResponse(api_url, payload=search_payload(3), ok=False))
+        context.emit('response', FakeResponse('https://www.airbnb.com/api/v2/other', payload=search_payload(4)))
+        self.assertEqual([l['room_id'] for l in state['search_api_listings']], ['1', '2'])
+
+    def test_collector_only_takes_results_page_searches(self):
+        state = {}
+        context = FakeContext()
+        SearchApiCollector(state).attach(context)
+        api_url = 'https://www.airbnb.com/api/v3/StaysSearch'
+
+        context.emit('response', FakeResponse(api_url, payload=search_payload(1), frame_url='https://www.airbnb.com/'))
+        context.emit('response', FakeResponse(api_url, payload=search_payload(2), frame_url=None))
+        self.assertNotIn('search_api_listings', state)
+
+        context.emit('response', FakeResponse(api_url, payload=search_payload(3)))
+        self.assertEqual([l['room_id'] for l in state['search_api_listings']], ['3'])
+
+    def test_results_page_prefers_api_listings(self):
+        listings = parse_search_payload(search_payload(*range(1, 31)), 'https://www.airbnb.com')
+        page = FakeEvaluatePage()
+        with scenario_state(search_api_listings=listings):
+            self.assertEqual(len(_scrape_listings(page)), 20)
+            self.assertEqual(len(_scrape_listings(page, limit=None)), 30)
+        self.assertEqual(page.calls, [])
+
+
+class FakeSearchPage(FakeWaitPage):
+    """A results page for whatever URL it was sent to, with one listing card."""
+
+    def goto(self, url, wait_until=None):
+        self.url = url
+
+    def evaluate(self, script, arg=None):
+        if script == SCRAPE_LISTINGS_JS:
+            return {'selector': 'article', 'cards': [{'title': 'Room 1', 'href': '/rooms/1'}]}
+        return super().evaluate(script, arg)
+
+
+class FastSearchTests(TestCase):
+
+    def test_pick_dates(self):
+        for today in (date(2026, 10, 18), date(2026, 12, 31), date(2027, 1, 31)):
+            for seed in range(100):
+                random.seed(seed)
+                checkin, checkout = fast_search._pick_dates(today)
+                months_ahead = (checkin.year - today.year) * 12 + checkin.month - today.month
+                self.assertTrue(3 <= months_ahead <= 8)
+                self.assertLessEqual(checkin.day, 15)
+                self.assertTrue(1 <= (checkout - checkin).days <= 10)
+
+    def test_pick_guests(self):
+        for seed in range(100):
+            random.seed(seed)
+            guests = fast_search._pick_guests()
+            self.assertEqual(list(guests), fast_search.GUEST_KEYS)
+            self.assertGreaterEqual(guests['adults'], 1)
+            self.assertTrue(2 <= sum(guests.values()) <= 5)
+
+    def test_label(self):
+        self.assertEqual(fast_search._label(date(2027, 3, 9)), 'Tuesday, March 9, 2027')
+
+    def test_search_url(self):
+        url = fast_search.search_url('https://www.airbnb.com/', 'São Paulo, Brazil', date(2027, 3, 9),
+                                     date(2027, 3, 12), {'adults': 2, 'children': 1, 'infants': 0, 'pets': 0})
+        self.assertEqual(url, 'https://www.airbnb.com/s/S%C3%A3o%20Paulo%2C%20Brazil/homes?'
+                              'checkin=2027-03-09&checkout=2027-03-12&adults=2&children=1&infants=0&pets=0')
+
+    def test_search_url_keeps_the_base_path(self):
+        guests = {'adults': 2, 'children': 0, 'infants': 0, 'pets': 0}
+        for base_url in ('http://127.0.0.1:8000/airbnb', 'http://127.0.0.1:8000/airbnb/'):
+            url = fast_search.search_url(base_url, 'Japan', date(2027, 3, 9), date(2027, 3, 12), guests)
+            self.assertTrue(url.startswith('http://127.0.0.1:8000/airbnb/s/Japan/homes?'), url)
+
+    def test_clears_listings_of_the_previous_page(self):
+        with scenario_state(country='Japan', search_api_listings=[{'room_id': '1'}]) as state:
+            fast_search.run(FakeSearchPage())
+        self.assertEqual(state['search_api_listings'], [])
+
+    def test_step05_accepts_the_search(self):
+        for seed in range(20):
+            random.seed(seed)
+            page = FakeSearchPage()
+            with scenario_state(country='Japan'):
+                fast_search.run(page)
+                step05.run(page)
+            result = Result.objects.filter(test_case='Step 05 - Results Page').latest('id')
+            self.assertTrue(result.passed, result.comment)
+
+
+class SuggestionCacheTests(TestCase):
+
+    live = [
+        {'id': 'bigsearch-query-location-suggestion-0', 'text': 'Japan', 'hasIcon': True, 'index': 0},
+        {'id': 'bigsearch-query-location-suggestion-1', 'text': 'Tokyo, Japan', 'hasIcon': False, 'index': 1},
+    ]
+
+    def test_refresh(self):
+        record_refresh('Japan', self.live, 2400)
+        record_refresh('Japan', self.live[:1], 1800)
+
+        entry = SuggestionCache.objects.get(query='Japan')
+        self.assertEqual((entry.misses, entry.hits, entry.refresh_ms), (2, 0, 1800))
+        self.assertEqual(entry.suggestions, [{'text': 'Japan', 'hasIcon': True}])
+
+    @override_settings(SUGGESTION_CACHE_TTL_HOURS=24)
+    def test_fresh_entry_ttl(self):
+        self.assertIsNone(fresh_entry('Japan'))
+        record_refresh('Japan', self.live, 2400)
+        self.assertEqual(fresh_entry('Japan').query, 'Japan')
+
+        SuggestionCache.objects.update(refreshed_at=timezone.now() - timedelta(hours=25))
+        self.assertIsNone(fresh_entry('Japan'))
+
+    def test_hit(self):
+        record_refresh('Japan', self.live, 2400)
+
+        self.assertTrue(record_hit(fresh_entry('Japan'), self.live))
+        self.assertFalse(record_hit(fresh_entry('Japan'), self.live[::-1]))
+
+        entry = SuggestionCache.objects.get(query='Japan')
+        self.assertEqual((entry.hits, entry.changed, entry.misses), (2, 1, 1))
+        self.assertEqual([s['text'] for s in entry.suggestions], ['Tokyo, Japan', 'Japan'])
+
+
+class CountryStatsTests(TestCase):
+
+    def test_record_attempt(self):
+        record_attempt('Japan', 'selected', 1200)
+        record_attempt('Japan', 'not_retained', 800)
+        record_attempt('Chad', 'no_suggestions', 5000)
+
+        stats = CountryStats.objects.get(country='Japan')
+        self.assertEqual((stats.attempts, stats.successes, stats.not_retained, stats.total_ms), (2, 1, 1, 2000))
+        self.assertEqual(stats.last_outcome, 'not_retained')
+        self.assertEqual(CountryStats.objects.get(country='Chad').no_suggestions, 1)
+
+    @override_settings(COUNTRY_EXPLORATION_RATE=0)
+    def test_order_candidates_prefers_fast_successes(self):
+        for _ in range(50):
+            record_attempt('Japan', 'selected', 1000)
+            record_attempt('Chad', 'no_suggestions', 20000)
+        random.seed(0)
+
+        self.assertEqual(order_candidates(['Chad', 'Japan']), (['Japan', 'Chad'], 'exploit'))
+
+    @override_settings(COUNTRY_EXPLORATION_RATE=1)
+    def test_order_candidates_explore(self):
+        order, mode = order_candidates(['Chad', 'Japan', 'Peru'])
+        self.assertEqual((sorted(order), mode), (['Chad', 'Japan', 'Peru'], 'explore'))
+
+    def test_reproducible_runs_stay_random(self):
+        # Adaptive ordering depends on the stats of earlier runs
+        with tempfile.NamedTemporaryFile(suffix='.har') as har:
+            for option in (['--seed', '1'], ['--replay-har', har.name]):
+                with self.assertRaisesMessage(CommandError, 'cannot be combined with --seed/--replay-har'):
+                    call_command('run_automation', '--country-selection', 'adaptive', *option)
+
+
+class CandidateCountryTests(TestCase):
+
+    def test_sharded_scenarios_fall_back_to_every_country(self):
+        for shards in (1, 4, 20):
+            for own in shard_countries(shards):
+                with scenario_state(candidate_countries='|||'.join(own), country_selection='random'):
+                    countries, selection = _candidates()
+                self.assertEqual(selection, 'random')
+                self.assertEqual(sorted(countries[:len(own)]), sorted(own))
+                self.assertEqual(sorted(countries), sorted(TOP_20_COUNTRIES))
+
+    @override_settings(COUNTRY_EXPLORATION_RATE=0)
+    def test_unsharded_scenario(self):
+        with scenario_state():
+            countries, selection = _candidates()
+        self.assertEqual(selection, 'adaptive (exploit)')
+        self.assertEqual(sorted(countries), sorted(TOP_20_COUNTRIES))
+
+
+class FixtureSiteTests(TestCase):
+
+    def page(self, query):
+        request = RequestFactory().get('/airbnb/s/Japan/homes', query)
+        return views._result_page(request, 'Japan')
+
+    @override_settings(FIXTURE_CARD_COUNT=20, FIXTURE_RESULT_PAGES=5)
+    def test_bad_parameters_fall_back_to_the_defaults(self):
+        page = self.page({'cards': 'abc', 'pages': '', 'items_offset': 'x'})
+
+        self.assertEqual(len(page['listings']), 20)
+        self.assertEqual(page['total'], 100)
+        self.assertEqual(page['page'], 1)
+
+    def test_parameters_are_clamped(self):
+        page = self.page({'cards': '100000', 'pages': '-3', 'items_offset': '-20'})
+
+        self.assertEqual(len(page['listings']), views.MAX_CARDS)
+        self.assertEqual(page['total'], views.MAX_CARDS)
+        self.assertEqual(page['next_url'], '')
+
+    @override_settings(FIXTURE_DELAY_MS=0)
+    def test_delay_is_capped(self):
+        with mock.patch('airbnb_fixture.views.time.sleep') as sleep:
+            views._delay(RequestFactory().get('/', {'delay_ms': '99999999'}))
+            views._delay(RequestFactory().get('/', {'delay_ms': 'soon'}))
+
+        sleep.assert_called_once_with(views.MAX_DELAY_MS / 1000)
+
+    def test_site_is_only_mounted_when_enabled(self):
+        import core.urls
+
+        def mounted():
+            importlib.reload(core.urls)
+            return any(str(pattern.pattern) == 'airbnb/' for pattern in core.urls.urlpatterns)
+
+        try:
+            with override_settings(DEBUG=False, FIXTURE_SITE=False):
+                self.assertFalse(mounted())
+            with override_settings(DEBUG=False, FIXTURE_SITE=True):
+                self.assertTrue(mounted())
+            with override_settings(DEBUG=True, FIXTURE_SITE=False):
+                self.assertTrue(mounted())
+        finally:
+            importlib.reload(core.urls)
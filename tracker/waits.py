@@ -0,0 +1,123 @@
+import time
+from tracker.instrument import record_wait
+from tracker.services import get_state, set_state
+
+# Resolves once no DOM mutation has happened for `quietMs`,
+# or with false when `timeoutMs` runs out first.
+DOM_QUIET_JS = """({quietMs, timeoutMs}) => new Promise(resolve => {
+    let quietTimer = null;
+    let hardTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => done(true), quietMs);
+    });
+    const done = (quiet) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(hardTimer);
+        resolve(quiet);
+    };
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true,
+    });
+    quietTimer = setTimeout(() => done(true), quietMs);
+    hardTimer = setTimeout(() => done(false), timeoutMs);
+})"""
+
+
+def _ledger() -> dict:
+    """Per-scenario {step: {'fixed_ms', 'waited_ms', 'waits'}} totals."""
+    ledger = get_state('wait_ledger')
+    if not ledger:
+        ledger = {}
+        set_state('wait_ledger', ledger)
+    return ledger
+
+
+def _record(fixed_ms: float, waited_ms: float):
+    entry = _ledger().setdefault(
+        get_state('step') or 'unknown', {'fixed_ms': 0, 'waited_ms': 0, 'waits': 0}
+    )
+    entry['fixed_ms'] += fixed_ms
+    entry['waited_ms'] += waited_ms
+    entry['waits'] += 1
+
+
+def wait_for_dom_quiet(page, quiet_ms: int = 300, timeout_ms: int = 5000) -> bool:
+    """Wait until the DOM has stopped changing for quiet_ms."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        remaining = int((deadline - time.monotonic()) * 1000)
+        if remaining <= 0:
+            return False
+        try:
+            return bool(page.evaluate(
+                DOM_QUIET_JS, {'quietMs': quiet_ms, 'timeoutMs': remaining}
+            ))
+        except Exception:
+            # Execution context was destroyed by a navigation — retry on the new document
+            time.sleep(0.05)
+
+
+def wait_until_ready(page, selector: str = None, state: str = 'visible', url_contains: str = None,
+                     load_state: str = None, quiet_ms: int = None, timeout_ms: int = 10000) -> bool:
+    """Wait for every given condition in turn, sharing one timeout.
+
+    Conditions: URL contains a fragment, a load state was reached,
+    a selector is in `state`, and finally the DOM is quiet for quiet_ms.
+    Returns False as soon as one of them runs out of time.
+    """
+    deadline = time.monotonic() + timeout_ms / 1000
+
+    def remaining() -> int:
+        # Playwright treats timeout=0 as "no timeout", so never go below 1 ms
+        return max(1, int((deadline - time.monotonic()) * 1000))
+
+    try:
+        if url_contains:
+            page.wait_for_url(lambda url: url_contains in url, timeout=remaining(),
+                              wait_until='commit')
+        if load_state:
+            page.wait_for_load_state(load_state, timeout=remaining())
+        if selector:
+            page.locator(selector).first.wait_for(state=state, timeout=remaining())
+    except Exception:
+        return False
+
+    if quiet_ms:
+        return wait_for_dom_quiet(page, quiet_ms=quiet_ms,
+                                  timeout_ms=int((deadline - time.monotonic()) * 1000))
+    return True
+
+
+def settle(page, fixed_ms: int, **conditions) -> bool:
+    """Drop-in replacement for a fixed wait of fixed_ms.
+
+    Ends as soon as the conditions hold (see wait_until_ready) and never
+    waits longer than the old fixed wait. The difference is recorded per step.
+    """
+    started = time.monotonic()
+    with record_wait():
+        ready = wait_until_ready(page, timeout_ms=fixed_ms, **conditions)
+    _record(fixed_ms, (time.monotonic() - started) * 1000)
+    return ready
+
+
+def pause(seconds: float):
+    """A short fixed pause that is still counted in the wait ledger."""
+    with record_wait():
+        time.sleep(seconds)
+    _record(seconds * 1000, seconds * 1000)
+
+
+def wait_report() -> dict:
+    """Return the wait ledger of the current scenario, rounded to ms."""
+    return {
+        step: {
+            'fixed_ms': round(entry['fixed_ms']),
+            'waited_ms': round(entry['waited_ms']),
+            'saved_ms': round(entry['fixed_ms'] - entry['waited_ms']),
+            'waits': entry['waits'],
+        }
+        for step, entry in _ledger().items()
+    }